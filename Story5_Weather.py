@@ -7,6 +7,7 @@ import os
 from scipy import stats
 from matplotlib.backends.backend_pdf import PdfPages
 import warnings
+from instrument import stage, traced
 
 warnings.filterwarnings('ignore')
 sns.set(style="whitegrid")
@@ -21,6 +22,7 @@ def add_speaker_notes(notes):
                 transform=plt.gcf().transFigure,
                 linespacing=1.5)
 
+@traced()
 def fetch_temperature_data():
     url = "https://data.giss.nasa.gov/gistemp/tabledata_v4/GLB.Ts+dSST.csv"
     df = pd.read_csv(url, skiprows=1)
@@ -28,10 +30,15 @@ def fetch_temperature_data():
     df['Anomaly'] = pd.to_numeric(df['Anomaly'], errors='coerce')
     return df.dropna()[df['Year'] >= 1995]
 
+@traced()
 def fetch_hurricane_data():
     url = "https://www.nhc.noaa.gov/data/hurdat/hurdat2-1851-2022-050423.txt"
     r = requests.get(url)
-    lines = r.text.splitlines()
+    return hurricane_table(r.text)
+
+@traced()
+def hurricane_table(text):
+    lines = text.splitlines()
 
     yearly_data = {}
     current_year, max_wind = None, 0
@@ -61,6 +68,7 @@ def fetch_hurricane_data():
         data.append([year, total, major, avg_wind])
     return pd.DataFrame(data, columns=['Year', 'Total_Hurricanes', 'Major_Hurricanes', 'Avg_Max_Wind'])
 
+@traced()
 def analyze(temp, hurricane):
     merged = pd.merge(temp, hurricane, on='Year')
     results = {'merged': merged, 'cor': {}, 'reg': {}}
@@ -153,7 +161,7 @@ def main():
     temp = fetch_temperature_data()
     hurricane = fetch_hurricane_data()
     results = analyze(temp, hurricane)
-    with PdfPages("output/climate_impact_presentation.pdf") as pdf:
+    with stage('slides'), PdfPages("output/climate_impact_presentation.pdf") as pdf:
         slide_intro(pdf)
         slide_combined_temp_hurricanes(temp, hurricane, pdf)
         slide_intensity_correlation(results, pdf)
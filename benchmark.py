@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# === Benchmarks for the report and map pipelines ===
+# Generates synthetic inputs at multiples of the bundled sizes and times each pipeline stage on its own:
+#   energy   SEDS production/consumption tables -> load, aggregate, metrics, merge, render, layer, save
+#   county   frames shaped like df_final.csv    -> store, load, clean, kde, scatter, regression, save
+#   climate  HURDAT2-formatted text             -> parse, analyze, render
+# `python benchmark.py` writes one JSON file per run (keyed by commit) under .cache/bench/; pass
+# --compare with an earlier file to see which stages got slower.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(ROOT, ".cache", "bench")
+SCALES = [1, 10, 100]
+SUITES = ['energy', 'county', 'climate']
+# Storms in hurdat2-1851-2022 (the 1x size of the synthetic HURDAT2 text)
+HURDAT2_STORMS = 1952
+
+ENERGY_TYPES = ['Coal', 'Natural Gas', 'Nuclear', 'Wind', 'Solar']
+
+
+# === Synthetic inputs ===
+
+def synthetic_seds(source, scale, out_path, rng):
+    """Copy of a SEDS CSV with its states repeated `scale` times under new codes, values jittered."""
+    from seds_loader import read_numeric_table
+    keys, years, values = read_numeric_table(os.path.join(ROOT, source))
+    df = pd.concat([keys, pd.DataFrame(values, columns=years)], axis=1)
+    frames = []
+    for k in range(scale):
+        copy = df.copy()
+        if k:
+            copy['State'] = [f"{s.strip()}{k}" for s in copy['State']]
+            copy[years] = np.round(values * rng.uniform(0.8, 1.2, size=values.shape), 3)
+        frames.append(copy)
+    pd.concat(frames, ignore_index=True).to_csv(out_path, index=False)
+    return out_path
+
+
+def synthetic_counties(scale, rng):
+    """df_final.csv rows resampled `scale` times with jittered numeric columns and fresh FIPS codes."""
+    df = pd.read_csv(os.path.join(ROOT, 'df_final.csv'))
+    out = df.sample(len(df) * scale, replace=True, random_state=rng.integers(1 << 31)).reset_index(drop=True)
+    numeric = out.select_dtypes('number').columns.drop(['fips', 'lat', 'lon'], errors='ignore')
+    out[numeric] = out[numeric] * rng.uniform(0.9, 1.1, size=(len(out), len(numeric)))
+    out['fips'] = np.arange(1, len(out) + 1)
+    return out
+
+
+def synthetic_hurdat2(scale, rng):
+    """HURDAT2 text with `scale` x the storms of the 1851-2022 file, 20-40 six-hourly fixes each."""
+    lines = []
+    years = rng.integers(1851, 2023, size=HURDAT2_STORMS * scale)
+    for n, year in enumerate(np.sort(years)):
+        fixes = int(rng.integers(20, 41))
+        peak = int(rng.integers(25, 165))
+        lines.append(f"AL{n % 100:02d}{year},            UNNAMED,     {fixes:2d},")
+        winds = np.minimum(peak, np.abs(rng.normal(peak * 0.7, 20, size=fixes)).astype(int) // 5 * 5)
+        for i, wind in enumerate(winds):
+            lines.append(f"{year}0{6 + i // 4 // 30}{1 + i // 4 % 28:02d}, {i % 4 * 6:02d}00,  , HU, 25.0N,  75.0W, "
+                         f"{wind:3d}, -999, -999, -999, -999, -999, -999, -999, -999, -999, -999, -999, -999, -999")
+    return "\n".join(lines)
+
+
+# === Timing ===
+
+@contextmanager
+def timed(results, suite, scale, stage, rows=None):
+    wall, cpu = time.perf_counter(), time.process_time()
+    yield
+    results.append({
+        'suite': suite, 'scale': scale, 'stage': stage, 'rows': rows,
+        'seconds': round(time.perf_counter() - wall, 4),
+        'cpu_seconds': round(time.process_time() - cpu, 4),
+    })
+    print(f"  {suite:<8} {scale:>4}x  {stage:<10} {results[-1]['seconds']:9.3f} s")
+
+
+# === Suites ===
+
+def bench_energy(scale, work_dir, results, rng):
+    import folium
+    from seds_loader import load_arrays
+    from seds_pipeline import state_energy_by_year
+    from energy_metrics import add_energy_metrics
+    from state_geometry import load_states
+    from geo_export import folium_layer
+    from popup_charts import render_charts, bar_chart
+
+    production = synthetic_seds('Energy_Production.csv', scale, os.path.join(work_dir, 'production.csv'), rng)
+    consumption = synthetic_seds('totalconsumption.csv', scale, os.path.join(work_dir, 'consumption.csv'), rng)
+    cache_dir = os.path.join(work_dir, 'seds-cache')
+
+    with timed(results, 'energy', scale, 'load'):
+        load_arrays(production, cache_dir)
+        load_arrays(consumption, cache_dir)
+    with timed(results, 'energy', scale, 'aggregate'):
+        by_year = state_energy_by_year(production, consumption, ENERGY_TYPES, cache_dir=cache_dir)
+    with timed(results, 'energy', scale, 'metrics', rows=len(by_year)):
+        state_data = add_energy_metrics(by_year[by_year['year'] == by_year['year'].max()], ENERGY_TYPES)
+
+    # One shape per synthetic state, reusing the real state shapes in turn
+    states = load_states('medium')
+    abbreviations = state_data['abbreviation'].to_numpy()
+    shapes = states.iloc[np.arange(len(abbreviations)) % len(states)].reset_index(drop=True)
+    shapes['abbreviation'] = abbreviations
+    with timed(results, 'energy', scale, 'merge', rows=len(state_data)):
+        merged = shapes.merge(state_data, on='abbreviation', how='left')
+
+    jobs = [{
+        'abbreviation': row['abbreviation'], 'labels': ENERGY_TYPES,
+        'values': [row[e] for e in ENERGY_TYPES], 'pct_values': [row[f'{e}_pct'] for e in ENERGY_TYPES],
+    } for _, row in merged.iterrows()]
+    with timed(results, 'energy', scale, 'render', rows=len(jobs)):
+        render_charts(bar_chart, jobs, cache_dir=os.path.join(work_dir, 'charts'))
+
+    m = folium.Map(location=[37.8, -96], zoom_start=4)
+    with timed(results, 'energy', scale, 'layer', rows=len(merged)):
+        folium_layer(merged, ['name', 'total_production', 'consumption', 'category'] + ENERGY_TYPES).add_to(m)
+    with timed(results, 'energy', scale, 'save'):
+        m.save(os.path.join(work_dir, 'map.html'))
+
+
+def bench_county(scale, work_dir, results, rng, pdf_mode='hybrid'):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    from density import kde_contour
+    from regression_band import regression_band
+    from pdf_layers import pdf_layer, save_page
+    from county_store import county_store, load_counties
+
+    path = os.path.join(work_dir, 'df_final.csv')
+    synthetic_counties(scale, rng).to_csv(path, index=False)
+
+    columns = ['ch_fi_rate_18', 'percent_children_in_poverty', 'percent_limited_access_to_healthy_foods',
+               'high_school_graduation_rate', 'percent_low_birthweight', 'median_household_income']
+    store_dir = os.path.join(work_dir, 'county-store')
+    with timed(results, 'county', scale, 'store'):
+        county_store(path, store_dir)
+    with timed(results, 'county', scale, 'load'):
+        df = load_counties(columns, path, store_dir)
+    with timed(results, 'county', scale, 'clean', rows=len(df)):
+        df = df.dropna(subset=columns)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    with timed(results, 'county', scale, 'kde', rows=len(df)):
+        # No cache: time the estimate itself
+        pdf_layer(kde_contour(ax, df['percent_children_in_poverty'], df['ch_fi_rate_18'], thresh=0, levels=100,
+                              cmap="Blues", alpha=0.6, cache_dir=None), 'density', pdf_mode)
+    with timed(results, 'county', scale, 'scatter', rows=len(df)):
+        pdf_layer(ax.scatter(df['percent_children_in_poverty'], df['ch_fi_rate_18'], s=100, alpha=0.7,
+                             edgecolors='black'), 'scatter', pdf_mode)
+    with timed(results, 'county', scale, 'regression', rows=len(df)):
+        regression_band(ax, df['percent_children_in_poverty'], df['ch_fi_rate_18'], color='black', cache_dir=None)
+    with timed(results, 'county', scale, 'save'):
+        with PdfPages(os.path.join(work_dir, 'report.pdf')) as pdf:
+            save_page(pdf, fig, pdf_mode)
+    plt.close(fig)
+    results[-1]['bytes'] = os.path.getsize(os.path.join(work_dir, 'report.pdf'))
+
+
+def bench_climate(scale, work_dir, results, rng):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    import Story5_Weather as story5
+
+    text = synthetic_hurdat2(scale, rng)
+    temp = pd.DataFrame({'Year': np.arange(1995, 2023), 'Anomaly': np.round(rng.normal(0.6, 0.2, 28), 2)})
+
+    with timed(results, 'climate', scale, 'parse', rows=text.count("\n") + 1):
+        hurricane = story5.hurricane_table(text)
+    with timed(results, 'climate', scale, 'analyze'):
+        analysis = story5.analyze(temp, hurricane)
+    with timed(results, 'climate', scale, 'render'):
+        with PdfPages(os.path.join(work_dir, 'climate.pdf')) as pdf:
+            story5.slide_combined_temp_hurricanes(temp, hurricane, pdf)
+            story5.slide_intensity_correlation(analysis, pdf)
+    plt.close('all')
+
+
+BENCHMARKS = {'energy': bench_energy, 'county': bench_county, 'climate': bench_climate}
+
+
+# === Runs ===
+
+def git_commit():
+    out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return out.stdout.strip() or 'unknown'
+
+
+def run(suites=SUITES, scales=SCALES, seed=0):
+    results = []
+    for suite in suites:
+        for scale in scales:
+            rng = np.random.default_rng(seed)
+            with tempfile.TemporaryDirectory() as work_dir:
+                BENCHMARKS[suite](scale, work_dir, results, rng)
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(previous, current, threshold=1.2):
+    """Print stage timings of `current` against `previous`; returns the stages slower by more than `threshold`x."""
+    before = {(r['suite'], r['scale'], r['stage']): r['seconds'] for r in previous['results']}
+    slower = []
+    print(f"\n{previous['commit']} -> {current['commit']}")
+    for r in current['results']:
+        key = (r['suite'], r['scale'], r['stage'])
+        if key not in before:
+            continue
+        ratio = r['seconds'] / before[key] if before[key] else float('inf')
+        flag = ''
+        if ratio > threshold:
+            slower.append(key)
+            flag = '  ← slower'
+        print(f"  {key[0]:<8} {key[1]:>4}x  {key[2]:<10} {before[key]:9.3f} s -> {r['seconds']:9.3f} s  ({ratio:.2f}x){flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on synthetic inputs at several scales.")
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"comma-separated subset of {SUITES}")
+    parser.add_argument('--scales', default=','.join(map(str, SCALES)), help="comma-separated multiples of the bundled sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="results file (default: .cache/bench/bench-<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio flagged by --compare")
+    args = parser.parse_args(argv)
+
+    suites = args.suites.split(',')
+    unknown = [s for s in suites if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown suites {unknown}; expected some of {SUITES}")
+    sys.path.insert(0, ROOT)
+
+    report = run(suites, [int(s) for s in args.scales.split(',')], args.seed)
+    out = args.out or os.path.join(BENCH_DIR, f"bench-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
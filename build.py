@@ -0,0 +1,293 @@
+import os
+import sys
+import ast
+import json
+import hashlib
+import inspect
+import argparse
+import subprocess
+import importlib
+import traceback
+
+# === Incremental build of the published reports and maps ===
+# Every artifact is declared as a stage with its input files, parameters and outputs. A stage is
+# fingerprinted from its inputs (including the local modules its script imports) and parameters;
+# `python build.py` only re-runs stages whose fingerprint changed or whose outputs are missing or were
+# modified since the last build. Stages that read another stage's outputs run after it. A stage that fails
+# (or whose inputs are missing) does not stop the build: the stages that depend on it are skipped, the
+# others still run, and the failures are reported at the end (--fail-fast stops at the first one).
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ROOT, ".cache", "build")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+
+
+def stage(name, outputs, script=None, func=None, inputs=(), params=None, args=()):
+    # script: a repo script run as `python <script> <args>`; func: 'module:function' called with **params
+    return {
+        'name': name, 'script': script, 'func': func, 'args': list(args),
+        'inputs': list(inputs), 'params': params or {}, 'outputs': list(outputs),
+    }
+
+
+# energy_analysis.py and energyFinal.py's default year mode write the same docs/energy_production_map.html
+# as test.py, which is the published version, so they are not build targets.
+STAGES = [
+    stage('energy_map', script='test.py',
+          inputs=['Energy_Production.csv', 'totalconsumption.csv', 'data/msn_catalog.csv',
+                  'data/geometry/us_states_medium.parquet'],
+          outputs=['docs/energy_production_map.html', 'docs/bars']),
+    stage('energy_timeline', script='energyFinal.py', args=['--mode', 'timeline'],
+          inputs=['Energy_Production.csv', 'totalconsumption.csv', 'data/msn_catalog.csv',
+                  'data/geometry/us_states_medium.parquet'],
+          outputs=['docs/energy_production_timeline.html']),
+    stage('energy_report', script='story7pdfGenerator.py',
+          inputs=['energyMap.png'],
+          outputs=['energy_production_report.pdf']),
+    # Every variant in food_security_reports.REPORTS from one data pass
+    stage('food_security_reports', func='food_security_reports:build_reports',
+          inputs=['df_final.csv'],
+          outputs=['Food_Security_Report.pdf', 'Food_Security_Report_Improved.pdf']),
+    stage('food_security_states', func='food_security_reports:build_state_reports',
+          inputs=['df_final.csv', 'data/census_regions.csv'],
+          outputs=['output/food_security_states', 'output/Food_Security_Report_States.pdf']),
+    # Downloads the county shapes; county_map reads the zoom-band files it writes
+    stage('county_geometry', func='county_map:build_county_geometry',
+          outputs=['docs/counties/counties_z0.json', 'docs/counties/counties_z6.json',
+                   'docs/counties/counties_z8.json']),
+    stage('county_map', func='county_map:build_county_map',
+          inputs=['df_final.csv', 'docs/counties/counties_z0.json', 'docs/counties/counties_z6.json',
+                  'docs/counties/counties_z8.json'],
+          params={'metric': 'ch_fi_rate_18'},
+          outputs=['docs/county_food_insecurity_map.html', 'docs/counties/ch_fi_rate_18.json']),
+    stage('salary_chart', script='DataSalariesChart.py',
+          inputs=['DataRolesSalary.xlsx'],
+          outputs=['salary_visualization_with_salary_values_in_legend.png', 'Story4_Umais_Siddiqui.pdf']),
+    # Fetches NASA/NOAA data over the network; only the script itself is fingerprinted
+    stage('climate_presentation', script='Story5_Weather.py',
+          outputs=['output/climate_impact_presentation.pdf']),
+]
+
+
+# === Fingerprints ===
+
+def _hash_path(path, digest):
+    path = os.path.join(ROOT, path)
+    if os.path.isdir(path):
+        for dirpath, _, filenames in sorted(os.walk(path)):
+            for filename in sorted(filenames):
+                full = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(full, ROOT).encode())
+                _hash_path(full, digest)
+    elif os.path.exists(path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    else:
+        digest.update(b'<missing>')
+
+
+def path_hash(path):
+    digest = hashlib.sha256()
+    _hash_path(path, digest)
+    return digest.hexdigest()
+
+
+def _module_level(nodes):
+    # Statements run when the module is loaded: everything outside function bodies
+    for node in nodes:
+        yield node
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            yield from _module_level(ast.iter_child_nodes(node))
+
+
+def imported_names(module_path, top_level=False):
+    """Modules a repo file imports; with top_level, only those imported when the file is loaded."""
+    with open(os.path.join(ROOT, module_path)) as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in (_module_level(tree.body) if top_level else ast.walk(tree)):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.append(node.module)
+    return names
+
+
+def local_imports(module_path, seen=None, top_level=False):
+    # Repo modules a script imports, followed recursively, so code changes invalidate its stage
+    seen = set() if seen is None else seen
+    for name in imported_names(module_path, top_level):
+        candidate = name.split('.')[0] + '.py'
+        if candidate not in seen and os.path.exists(os.path.join(ROOT, candidate)):
+            seen.add(candidate)
+            local_imports(candidate, seen, top_level)
+    return seen
+
+
+def stage_sources(st):
+    if st['script']:
+        return [st['script']] + sorted(local_imports(st['script']))
+    module = st['func'].split(':')[0] + '.py'
+    return [module] + sorted(local_imports(module))
+
+
+def fingerprint(st, upstream):
+    digest = hashlib.sha256()
+    for path in sorted(set(st['inputs']) | set(stage_sources(st))):
+        digest.update(path.encode())
+        digest.update(path_hash(path).encode())
+    digest.update(json.dumps([st['params'], st['args']], sort_keys=True, default=str).encode())
+    for name in sorted(upstream):
+        digest.update(upstream[name].encode())
+    return digest.hexdigest()
+
+
+# === Graph ===
+
+def stage_order(stages):
+    producers = {out: st['name'] for st in stages for out in st['outputs']}
+    deps = {st['name']: {producers[i] for i in st['inputs'] if i in producers} for st in stages}
+    order, done = [], set()
+
+    def visit(name, trail=()):
+        if name in done:
+            return
+        if name in trail:
+            raise ValueError(f"Build graph has a cycle: {' -> '.join(trail + (name,))}")
+        for dep in sorted(deps[name]):
+            visit(dep, trail + (name,))
+        done.add(name)
+        order.append(name)
+
+    for st in stages:
+        visit(st['name'])
+    return order, deps
+
+
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    tmp = MANIFEST_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def is_stale(st, fp, manifest):
+    record = manifest.get(st['name'])
+    if record is None or record['fingerprint'] != fp:
+        return True
+    # Outputs deleted or edited by hand since the last build also trigger a rebuild
+    return any(record['outputs'].get(out) != path_hash(out) for out in st['outputs'])
+
+
+def run_stage(st):
+    if st['script']:
+        env = dict(os.environ, MPLBACKEND='Agg')
+        subprocess.run([sys.executable, st['script'], *st['args']], cwd=ROOT, env=env, check=True)
+    else:
+        module_name, func_name = st['func'].split(':')
+        cwd = os.getcwd()
+        os.chdir(ROOT)
+        try:
+            getattr(importlib.import_module(module_name), func_name)(**st['params'])
+        finally:
+            os.chdir(cwd)
+
+
+def build(targets=None, force=False, dry_run=False, fail_fast=False, stages=STAGES):
+    by_name = {st['name']: st for st in stages}
+    producers = {out for st in stages for out in st['outputs']}
+    order, deps = stage_order(stages)
+    if targets:
+        unknown = [t for t in targets if t not in by_name]
+        if unknown:
+            raise KeyError(f"Unknown build targets {unknown}; expected some of {order}")
+        wanted = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(deps[name])
+        order = [name for name in order if name in wanted]
+
+    manifest = load_manifest()
+    fingerprints, rebuilt, failed, skipped = {}, [], {}, []
+    for name in order:
+        st = by_name[name]
+        blocked = sorted(d for d in deps[name] if d in failed or d in skipped)
+        missing = [i for i in st['inputs'] if i not in producers and not os.path.exists(os.path.join(ROOT, i))]
+        if blocked or missing:
+            reason = f"upstream {blocked} did not build" if blocked else f"missing inputs {missing}"
+            print(f"· {name} skipped: {reason}")
+            skipped.append(name)
+            continue
+        fp = fingerprint(st, {d: fingerprints[d] for d in deps[name]})
+        fingerprints[name] = fp
+        if not force and not is_stale(st, fp, manifest):
+            print(f"· {name} is up to date")
+            continue
+        print(f"▶ {name}")
+        if dry_run:
+            continue
+        try:
+            run_stage(st)
+        except Exception as exc:
+            if fail_fast:
+                raise
+            traceback.print_exc()
+            print(f"✗ {name} failed: {exc}")
+            failed[name] = exc
+            continue
+        manifest[name] = {'fingerprint': fp, 'outputs': {out: path_hash(out) for out in st['outputs']}}
+        save_manifest(manifest)
+        rebuilt.append(name)
+    if failed:
+        raise RuntimeError(f"Build stages failed: {', '.join(failed)}"
+                           + (f"; skipped: {', '.join(skipped)}" if skipped else ""))
+    return rebuilt
+
+
+# === Cached intermediate DataFrames ===
+
+def cached_frame(name, func, inputs=(), **kwargs):
+    """Return func(**kwargs), cached as Parquet under .cache/build/frames until inputs, kwargs or func's module change."""
+    digest = hashlib.sha256()
+    module = os.path.relpath(inspect.getfile(func), ROOT)
+    for path in sorted(set(inputs) | {module} | local_imports(module)):
+        digest.update(path_hash(path).encode())
+    digest.update(json.dumps(kwargs, sort_keys=True, default=str).encode())
+    path = os.path.join(BUILD_DIR, "frames", f"{name}-{digest.hexdigest()[:16]}.parquet")
+    import pandas as pd
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    df = func(**kwargs)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the reports and maps whose inputs changed.")
+    parser.add_argument('targets', nargs='*', help="stages to build (default: all)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only list the stages that would run")
+    parser.add_argument('--fail-fast', action='store_true', help="stop at the first stage that fails")
+    args = parser.parse_args(argv)
+    try:
+        build(args.targets, force=args.force, dry_run=args.dry_run, fail_fast=args.fail_fast)
+    except RuntimeError as exc:
+        sys.exit(f"✗ {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# === Single entry point for the report and map generators ===
+# `python cli.py <command>` runs one generator. Only the standard library is imported up front; pandas,
+# geopandas, folium, matplotlib, seaborn, scipy and fpdf are loaded by the command that needs them, so
+# `python cli.py --help`, `build` with nothing to do, or `startup` cost a few milliseconds instead of
+# the seconds a full import takes. `python cli.py startup` reports what each command pays at import.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# name -> script run in-process (with optional `args`), or 'module:function'
+COMMANDS = {
+    'energy-map': {
+        'script': 'test.py', 'help': "interactive energy production map (docs/energy_production_map.html)",
+    },
+    'energy-timeline': {
+        'script': 'energyFinal.py', 'args': ['--mode', 'timeline'],
+        'help': "energy map with a 1960-2022 year slider (docs/energy_production_timeline.html)",
+    },
+    'energy-report': {
+        'script': 'story7pdfGenerator.py', 'help': "energy production PDF report",
+    },
+    'food-security-report': {
+        'script': 'df_final.py', 'help': "Food_Security_Report.pdf",
+    },
+    'food-security-improved': {
+        'script': 'food_insecurity_highschool.py', 'help': "Food_Security_Report_Improved.pdf",
+    },
+    'food-security-reports': {
+        'func': 'food_security_reports:build_reports', 'help': "every food-security PDF variant in one run",
+    },
+    'food-security-states': {
+        'func': 'food_security_reports:build_state_reports',
+        'help': "one food-security PDF per state plus the combined, indexed PDF (output/)",
+    },
+    'county-map': {
+        'func': 'county_map:build_county_map', 'help': "county choropleth (docs/county_food_insecurity_map.html)",
+    },
+    'county-geometry': {
+        'func': 'county_map:build_county_geometry', 'help': "per-zoom-band county TopoJSON files",
+    },
+    'state-geometry': {
+        'func': 'state_geometry:build_store', 'help': "offline US state geometry store (data/geometry)",
+    },
+    'salary-chart': {
+        'script': 'DataSalariesChart.py', 'help': "data roles salary chart and PDF",
+    },
+    'climate': {
+        'script': 'Story5_Weather.py', 'help': "climate impact presentation (downloads NASA/NOAA data)",
+    },
+}
+
+
+def run_script(script, args=()):
+    import runpy
+    argv = sys.argv
+    sys.argv = [script, *args]
+    try:
+        runpy.run_path(os.path.join(ROOT, script), run_name='__main__')
+    finally:
+        sys.argv = argv
+
+
+def run_func(spec, **kwargs):
+    import importlib
+    module_name, func_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), func_name)(**kwargs)
+
+
+def run_command(name, args):
+    command = COMMANDS[name]
+    if 'script' in command:
+        run_script(command['script'], command.get('args', ()))
+    elif name == 'county-map':
+        run_func(command['func'], metric=args.metric)
+    elif name == 'food-security-reports':
+        run_func(command['func'], names=args.reports or None, processes=args.processes)
+    elif name == 'food-security-states':
+        run_func(command['func'], states=args.states or None, processes=args.processes)
+    elif args.source:
+        run_func(command['func'], source=args.source)
+    else:
+        run_func(command['func'])
+
+
+# === Startup-time report ===
+# What a command imports is read from its source (build.imported_names), so the report follows the code:
+# a script pays for the modules it imports at the top, a 'module:function' command for its module.
+
+# Engines pandas/geopandas load on first use rather than at import, by the repo module whose calls need them
+ENGINE_IMPORTS = {'build': ['pyarrow'], 'state_geometry': ['pyarrow']}
+
+
+def _loaded_modules(command):
+    # The command's entry file and every repo module it loads with it
+    import build
+    entry = command['script'] if 'script' in command else command['func'].split(':')[0] + '.py'
+    return entry, [entry, *sorted(build.local_imports(entry, top_level=True))]
+
+
+def _engines(paths):
+    return sorted({e for path in paths for e in ENGINE_IMPORTS.get(path[:-len('.py')], [])})
+
+
+def command_imports(command):
+    """Modules to import to pay what the command pays before its own code runs."""
+    import build
+    entry, paths = _loaded_modules(command)
+    modules = [entry[:-len('.py')]] if 'func' in command else build.imported_names(entry, top_level=True)
+    return modules + _engines(paths)
+
+
+def command_libraries(command):
+    """Third-party modules the command loads, directly or through the repo modules it imports."""
+    import build
+    _, paths = _loaded_modules(command)
+    names = set(_engines(paths))
+    for path in paths:
+        for name in build.imported_names(path, top_level=True):
+            root = name.split('.')[0]
+            if root not in sys.stdlib_module_names and not os.path.exists(os.path.join(ROOT, root + '.py')):
+                names.add(name)
+    return names
+
+
+def import_seconds(modules):
+    # Fresh interpreter per measurement so earlier imports don't hide the cost
+    code = ("import time; t = time.perf_counter()\n"
+            + "".join(f"import {m}\n" for m in modules)
+            + "print(time.perf_counter() - t)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    return float(out.stdout) if out.returncode == 0 else None
+
+
+def startup_report(repeat=3):
+    cli = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, 'cli.py'), '--help'], capture_output=True)
+        cli.append(time.perf_counter() - t)
+
+    def best(modules):
+        times = [s for s in (import_seconds(modules) for _ in range(repeat)) if s is not None]
+        return min(times) if times else None
+
+    # Per package, every submodule the repo imports from it (matplotlib.pyplot costs more than matplotlib)
+    libraries = {}
+    for command in COMMANDS.values():
+        for name in command_libraries(command):
+            libraries.setdefault(name.split('.')[0], set()).add(name)
+    lib_times = {root: best(sorted(names)) for root, names in sorted(libraries.items())}
+    command_times = {name: best(command_imports(command)) for name, command in COMMANDS.items()}
+    return {'cli_help_seconds': min(cli), 'libraries': lib_times, 'commands': command_times}
+
+
+def print_startup_report(report):
+    print(f"python cli.py --help: {report['cli_help_seconds'] * 1000:.0f} ms (interpreter start included)")
+    print("\nImport cost per library:")
+    for name, seconds in sorted(report['libraries'].items(), key=lambda kv: -(kv[1] or 0)):
+        print(f"  {name:<20} " + ("not installed" if seconds is None else f"{seconds * 1000:8.0f} ms"))
+    print("\nImport cost per command:")
+    for name, seconds in report['commands'].items():
+        print(f"  {name:<24} " + ("missing a dependency" if seconds is None else f"{seconds * 1000:8.0f} ms"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the reports and maps in this repository.")
+    parser.add_argument('--timing', action='store_true', help="print how long the command took")
+    parser.add_argument('--trace', metavar='PATH', help="write a per-stage timing/memory trace (see instrument.py)")
+    parser.add_argument('--tracemalloc', type=int, default=0, metavar='N',
+                        help="with --trace, also record the N largest allocation sites per stage")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, command in COMMANDS.items():
+        p = sub.add_parser(name, help=command['help'])
+        if name == 'county-map':
+            p.add_argument('--metric', default='ch_fi_rate_18', help="df_final.csv column to map")
+        elif name == 'food-security-reports':
+            p.add_argument('reports', nargs='*', help="variants to build (default: all in food_security_reports.REPORTS)")
+            p.add_argument('--processes', type=int, help="worker processes (default: one per CPU)")
+        elif name == 'food-security-states':
+            p.add_argument('states', nargs='*', help="state names to build (default: every state in df_final.csv)")
+            p.add_argument('--processes', type=int, help="worker processes (default: one per CPU)")
+        elif 'func' in command:
+            p.add_argument('source', nargs='?', help="GeoJSON path or URL (default: the published source)")
+    # Everything after `build` or `bench` is handed to that module's own parser
+    sub.add_parser('build', help="rebuild only the outputs whose inputs changed (see build.py)", add_help=False)
+    sub.add_parser('bench', help="time each pipeline stage on synthetic data (see benchmark.py)", add_help=False)
+    p = sub.add_parser('startup', help="report the import cost of each command")
+    p.add_argument('--repeat', type=int, default=3, help="best of N fresh interpreters")
+    p.add_argument('--json', help="also write the report to this file")
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in ('build', 'bench'):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    # Generators are run from cron/CI without a display
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    if args.trace:
+        # Read by instrument.py when the command first imports it
+        os.environ['REPORT_TRACE'] = os.path.abspath(args.trace)
+        os.environ['REPORT_TRACEMALLOC'] = str(args.tracemalloc)
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    start, modules = time.perf_counter(), len(sys.modules)
+
+    if args.command == 'build':
+        import build
+        build.main(extra)
+    elif args.command == 'bench':
+        import benchmark
+        benchmark.main(extra)
+    elif args.command == 'startup':
+        report = startup_report(args.repeat)
+        print_startup_report(report)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+    else:
+        run_command(args.command, args)
+
+    if args.timing:
+        print(f"⏱ {args.command}: {time.perf_counter() - start:.2f} s, {len(sys.modules) - modules} modules imported",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import json
+import warnings
+import numpy as np
+import pandas as pd
+from disk_cache import file_hash, publish_dir
+from county_store import COUNTY_CSV, CACHE_DIR, county_store, load_counties, store_schema
+from instrument import traced
+
+# === State and region aggregates of every county metric ===
+# One vectorized pass over the county store computes, for every numeric df_final column and every
+# state, Census division and Census region (data/census_regions.csv):
+#   count, sum, mean, weighted_mean (by total_population), min, p10, p25, median, p75, p90, max
+# Missing county values are skipped, and weighted means only use the population of counties that have
+# the value. The cube is saved next to the county store and memory-mapped by load_aggregates(), so a
+# state chart reads its numbers instead of grouping the county rows again.
+
+REGIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "census_regions.csv")
+WEIGHT = 'total_population'
+LEVELS = ['state', 'division', 'region']
+QUANTILES = {'min': 0, 'p10': 0.1, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9, 'max': 1}
+STATS = ['count', 'sum', 'mean', 'weighted_mean'] + list(QUANTILES)
+
+
+def _group_stats(values, weights, codes, n_groups):
+    """(groups, stats, metrics) array of STATS over the rows of `values` grouped by integer code."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0)
+    w = np.where(present, weights[:, None], 0)
+    out = np.full((n_groups, len(STATS), values.shape[1]), np.nan)
+
+    count = np.zeros((n_groups, values.shape[1]))
+    total = np.zeros_like(count)
+    weighted = np.zeros_like(count)
+    weight_sum = np.zeros_like(count)
+    np.add.at(count, codes, present)
+    np.add.at(total, codes, filled)
+    np.add.at(weighted, codes, filled * w)
+    np.add.at(weight_sum, codes, w)
+    out[:, 0] = count
+    out[:, 1] = total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 2] = np.where(count > 0, total / count, np.nan)
+        out[:, 3] = np.where(weight_sum > 0, weighted / weight_sum, np.nan)
+
+    # Quantiles (min and max included) on each group's contiguous block of rows, all metrics at once
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    rows = values[order]
+    for g in range(n_groups):
+        with warnings.catch_warnings():
+            # A metric missing for every county of a group stays NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            out[g, 4:] = np.nanquantile(rows[bounds[g]:bounds[g + 1]], list(QUANTILES.values()), axis=0)
+    return out
+
+
+@traced()
+def _build_cube(path, cache_dir, regions_path):
+    schema = store_schema(path, cache_dir)['columns']
+    metrics = [c for c, entry in schema.items() if entry['kind'] in ('float', 'int') and c != 'fips']
+    df = load_counties(['state_name'] + metrics, path, cache_dir)
+    regions = pd.read_csv(regions_path).set_index('state_name')
+    unknown = sorted(set(df['state_name'].dropna().astype(str)) - set(regions.index))
+    if unknown:
+        raise KeyError(f"States {unknown} have no region in {regions_path}")
+
+    values = df[metrics].to_numpy(dtype=np.float64)
+    weights = np.nan_to_num(df[WEIGHT].to_numpy(dtype=np.float64))
+    states = df['state_name'].astype(str)
+    level, group, blocks = [], [], []
+    for name, labels in (('state', states),
+                         ('division', states.map(regions['division'])),
+                         ('region', states.map(regions['region']))):
+        codes, names = pd.factorize(labels, sort=True)
+        blocks.append(_group_stats(values[codes >= 0], weights[codes >= 0], codes[codes >= 0], len(names)))
+        level += [name] * len(names)
+        group += list(names)
+    return {
+        'level': np.array(level, dtype=str),
+        'group': np.array(group, dtype=str),
+        'metric': np.array(metrics, dtype=str),
+        'stat': np.array(STATS, dtype=str),
+        'values': np.concatenate(blocks),
+    }
+
+
+def aggregate_cube(path=COUNTY_CSV, cache_dir=CACHE_DIR, regions_path=REGIONS_PATH):
+    """The cube as arrays: level/group labels per row, metric and stat labels, values[group, stat, metric]."""
+    cube_path = os.path.join(county_store(path, cache_dir), f"aggregates-{file_hash(regions_path)[:16]}")
+    if not os.path.isdir(cube_path):
+        cube = _build_cube(path, cache_dir, regions_path)
+        with publish_dir(cube_path) as tmp_dir:
+            for name, arr in cube.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), arr, allow_pickle=False)
+            with open(os.path.join(tmp_dir, "cube.json"), 'w') as f:
+                json.dump({'weight': WEIGHT, 'levels': LEVELS, 'stats': STATS}, f, indent=1)
+    cube = {name: np.load(os.path.join(cube_path, f"{name}.npy")) for name in ('level', 'group', 'metric', 'stat')}
+    cube['values'] = np.load(os.path.join(cube_path, "values.npy"), mmap_mode='r')
+    return cube
+
+
+def load_aggregates(stat='weighted_mean', metrics=None, level='state', path=COUNTY_CSV, cache_dir=CACHE_DIR):
+    """One statistic per group of `level` as a frame indexed by group name, one column per metric."""
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level {level!r}; expected one of {LEVELS}")
+    if stat not in STATS:
+        raise ValueError(f"Unknown statistic {stat!r}; expected one of {STATS}")
+    cube = aggregate_cube(path, cache_dir)
+    available = list(cube['metric'])
+    metrics = available if metrics is None else list(metrics)
+    missing = [m for m in metrics if m not in available]
+    if missing:
+        raise KeyError(f"No aggregates for {missing}; numeric columns: {available}")
+
+    rows = np.flatnonzero(cube['level'] == level)
+    cols = [available.index(m) for m in metrics]
+    values = cube['values'][rows, STATS.index(stat)][:, cols]
+    index = pd.Index(cube['group'][rows], name={'state': 'state_name'}.get(level, level))
+    return pd.DataFrame(values, index=index, columns=metrics)
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import numpy as np
+import geopandas as gpd
+import folium
+from geo_export import topojson
+from county_store import load_counties
+from state_geometry import simplify_coverage
+from instrument import stage, traced
+
+# === County-level choropleth for the df_final.csv metrics ===
+# A single full-detail county GeoJSON is tens of MB. Instead the county shapes are pre-simplified once
+# per zoom band and written as TopoJSON files next to the map; the page only fetches the band that
+# matches the current zoom (and the metric values once), so the HTML itself stays a few KB.
+# The files are fetched with fetch(), so open the published page over http(s), not file://.
+
+COUNTY_SOURCE_URL = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
+COUNTY_DIR = os.path.join("docs", "counties")
+
+# (min zoom, max zoom, simplification tolerance in degrees or None for source detail, TopoJSON quantization).
+# Counties are simplified together as one coverage (see state_geometry.simplify_coverage) so neighbors keep
+# their shared borders; its tolerances are about twice the per-polygon ones for the same vertex count.
+ZOOM_BANDS = [
+    (0, 5, 0.06, 1e4),
+    (6, 7, 0.016, 1e5),
+    (8, 18, None, 1e6),
+]
+
+# ColorBrewer YlOrRd, 7 classes
+CHOROPLETH_COLORS = ['#ffffb2', '#fed976', '#feb24c', '#fd8d3c', '#fc4e2a', '#e31a1c', '#b10026']
+
+
+def band_filename(min_zoom):
+    return f"counties_z{min_zoom}.json"
+
+
+def load_county_shapes(source=COUNTY_SOURCE_URL):
+    counties = gpd.read_file(source)
+    # Sources differ in where they keep the 5-digit FIPS code
+    for col in ['fips', 'id', 'GEOID', 'GEO_ID']:
+        if col in counties.columns:
+            fips = counties[col].astype(str).str[-5:]
+            break
+    else:
+        raise KeyError(f"{source} has no FIPS column (expected one of fips/id/GEOID/GEO_ID)")
+    counties = gpd.GeoDataFrame({'fips': fips.str.zfill(5)}, geometry=counties.geometry, crs=counties.crs)
+    return counties.to_crs("EPSG:4326") if counties.crs is not None else counties.set_crs("EPSG:4326")
+
+
+@traced()
+def build_county_geometry(source=COUNTY_SOURCE_URL, out_dir=COUNTY_DIR):
+    counties = load_county_shapes(source)
+    os.makedirs(out_dir, exist_ok=True)
+    for min_zoom, _, tolerance, quantization in ZOOM_BANDS:
+        band = counties.copy() if tolerance is None else simplify_coverage(counties, tolerance)
+        path = os.path.join(out_dir, band_filename(min_zoom))
+        with open(path, 'w') as f:
+            json.dump(topojson(band, ['fips'], object_name='counties', quantization=quantization), f, separators=(',', ':'))
+        print(f"✅ zoom {min_zoom}+: {os.path.getsize(path):,} bytes -> {path}")
+
+
+def county_metric_payload(df, metric):
+    df = df.dropna(subset=[metric])
+    fips = df['fips'].astype(int).astype(str).str.zfill(5)
+    values = df[metric].to_numpy(dtype=float)
+    breaks = np.array([])
+    if len(values):
+        breaks = np.unique(np.quantile(values, np.linspace(0, 1, len(CHOROPLETH_COLORS) + 1)[1:-1]))
+        # A break at the minimum would leave the lowest class empty; a constant metric is a single class
+        breaks = breaks[breaks > values.min()]
+    return {
+        'metric': metric,
+        'values': dict(zip(fips, np.round(values, 2).tolist())),
+        'names': dict(zip(fips, df['county'].astype(str) + ', ' + df['state_abr'].astype(str))),
+        'breaks': np.round(breaks, 2).tolist(),
+        'colors': CHOROPLETH_COLORS[:len(breaks) + 1],
+    }
+
+
+COUNTY_LAYER_JS = """
+document.addEventListener('DOMContentLoaded', function () {
+    var map = %(map)s;
+    var bands = %(bands)s;
+    var layer = null, current = null, cache = {};
+    var data = fetch(%(data_url)s).then(function (r) { return r.json(); });
+
+    function fill(payload, fips) {
+        var v = payload.values[fips];
+        if (v === undefined || v === null) { return '#cccccc'; }
+        var i = 0;
+        while (i < payload.breaks.length && v >= payload.breaks[i]) { i++; }
+        return payload.colors[i];
+    }
+
+    function show(band) {
+        if (band === current) { return; }
+        current = band;
+        cache[band.url] = cache[band.url] || fetch(band.url).then(function (r) { return r.json(); });
+        Promise.all([cache[band.url], data]).then(function (loaded) {
+            if (current !== band) { return; }
+            var topo = loaded[0], payload = loaded[1];
+            var next = L.geoJSON(topojson.feature(topo, topo.objects.counties), {
+                style: function (f) {
+                    return {fillColor: fill(payload, f.properties.fips), color: '#555', weight: 0.3, fillOpacity: 0.8};
+                },
+                onEachFeature: function (f, l) {
+                    var fips = f.properties.fips, v = payload.values[fips];
+                    l.bindTooltip((payload.names[fips] || fips) + ': ' + (v === undefined ? 'n/a' : v), {sticky: true});
+                }
+            }).addTo(map);
+            if (layer) { map.removeLayer(layer); }
+            layer = next;
+        });
+    }
+
+    function update() {
+        // Fractional zooms (zoomSnap < 1, pinch zoom) use the band of the whole zoom level below
+        var z = Math.floor(map.getZoom());
+        show(bands.find(function (b) { return z >= b.min && z <= b.max; }) || bands[bands.length - 1]);
+    }
+    map.on('zoomend', update);
+    update();
+});
+"""
+
+
+def build_county_map(metric='ch_fi_rate_18', title='Child Food Insecurity Rate (%)',
+                     data_path='df_final.csv', out_html=os.path.join("docs", "county_food_insecurity_map.html")):
+    out_dir = os.path.dirname(out_html) or '.'
+    county_dir = os.path.join(out_dir, "counties")
+    missing = [b for b in ZOOM_BANDS if not os.path.exists(os.path.join(county_dir, band_filename(b[0])))]
+    if missing:
+        raise FileNotFoundError(f"County geometry is missing in {county_dir}; run `python county_map.py [source]` first")
+
+    with stage('load'):
+        df = load_counties(['fips', 'county', 'state_abr', metric], path=data_path)
+    with stage('metric_payload'):
+        payload = county_metric_payload(df, metric)
+    with open(os.path.join(county_dir, f"{metric}.json"), 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+
+    m = folium.Map(location=[37.8, -96], zoom_start=4)
+    m.get_root().header.add_child(folium.JavascriptLink("https://unpkg.com/topojson-client@3"))
+    bands = [{'min': lo, 'max': hi, 'url': f"counties/{band_filename(lo)}"} for lo, hi, _, _ in ZOOM_BANDS]
+    m.get_root().script.add_child(folium.Element(COUNTY_LAYER_JS % {
+        'map': m.get_name(),
+        'bands': json.dumps(bands),
+        'data_url': json.dumps(f"counties/{metric}.json"),
+    }))
+
+    legend_labels = ["All counties"]
+    if payload['breaks']:
+        legend_labels = [f"&lt; {payload['breaks'][0]}"] + [
+            f"{a} – {b}" for a, b in zip(payload['breaks'][:-1], payload['breaks'][1:])
+        ] + [f"≥ {payload['breaks'][-1]}"]
+    legend_html = f'''
+    <div style="position: fixed; top: 50px; right: 50px; background-color: white; border:2px solid grey;
+         z-index:9999; font-size:13px; padding: 12px;">
+    <b>{title}</b><br>
+    {''.join(f'<i style="background:{c};padding:2px 8px;">&nbsp;</i> {label}<br>'
+             for c, label in zip(payload['colors'], legend_labels))}
+    </div>
+    '''
+    m.get_root().html.add_child(folium.Element(legend_html))
+
+    with stage('save'):
+        m.save(out_html)
+    print(f"✅ County map saved to {out_html}")
+
+
+if __name__ == "__main__":
+    build_county_geometry(sys.argv[1] if len(sys.argv) > 1 else COUNTY_SOURCE_URL)
+    build_county_map()
@@ -0,0 +1,99 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from disk_cache import file_hash, publish_dir
+from instrument import traced
+
+# === Typed, column-pruned store for the county table (df_final.csv) ===
+# The first load converts the CSV once into one .npy file per column, keyed by the CSV's content hash:
+#   float columns   float32 when every value survives the round trip (the CSV has few significant
+#                   digits), float64 otherwise
+#   integer columns the smallest integer type that holds them (fips -> int32)
+#   text columns    categorical: integer codes plus the sorted labels (state_name, county, state_abr)
+# Later loads memory-map only the requested columns, so a script reading 6 of the 60 columns never
+# parses or holds the other 54.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+COUNTY_CSV = os.path.join(ROOT, "df_final.csv")
+CACHE_DIR = os.path.join(ROOT, ".cache", "county")
+
+
+def _float32_safe(values, sample=1000):
+    finite = values[np.isfinite(values)]
+
+    def reads_back(v):
+        # float32 prints its shortest round-trip repr, so this checks the value reads back unchanged
+        return np.array_equal(v.astype(np.float32).astype(str).astype(np.float64), v)
+    # Columns with full-precision values fail on the first few rows, before the whole column is formatted
+    return reads_back(finite[:sample]) and reads_back(finite)
+
+
+def _typed_column(col):
+    """(arrays, schema entry) for one CSV column."""
+    if pd.api.types.is_integer_dtype(col.dtype):
+        values = col.to_numpy()
+        dtype = np.int32 if np.iinfo(np.int32).min <= values.min() and values.max() <= np.iinfo(np.int32).max else np.int64
+        return {'values': values.astype(dtype)}, {'kind': 'int', 'dtype': np.dtype(dtype).name}
+    if pd.api.types.is_numeric_dtype(col.dtype):
+        values = col.to_numpy(dtype=np.float64)
+        dtype = np.float32 if _float32_safe(values) else np.float64
+        return {'values': values.astype(dtype)}, {'kind': 'float', 'dtype': np.dtype(dtype).name}
+    codes, labels = pd.factorize(col, sort=True)
+    dtype = np.int16 if len(labels) < np.iinfo(np.int16).max else np.int32
+    return ({'codes': codes.astype(dtype), 'labels': np.asarray(labels, dtype=str)},
+            {'kind': 'category', 'dtype': np.dtype(dtype).name})
+
+
+@traced()
+def _convert(path, store_path):
+    df = pd.read_csv(path)
+    schema = {}
+    with publish_dir(store_path) as tmp_dir:
+        for i, name in enumerate(df.columns):
+            arrays, schema[name] = _typed_column(df[name])
+            schema[name]['file'] = f"c{i:03d}"
+            for part, arr in arrays.items():
+                np.save(os.path.join(tmp_dir, f"c{i:03d}.{part}.npy"), arr, allow_pickle=False)
+        with open(os.path.join(tmp_dir, "schema.json"), 'w') as f:
+            json.dump({'source': os.path.basename(path), 'rows': len(df), 'columns': schema}, f, indent=1)
+
+
+def county_store(path=COUNTY_CSV, cache_dir=CACHE_DIR):
+    """Directory of the typed store for `path`, converting the CSV on first use."""
+    store_path = os.path.join(cache_dir, f"{os.path.basename(path)}-{file_hash(path)[:16]}")
+    if not os.path.isdir(store_path):
+        _convert(path, store_path)
+    return store_path
+
+
+def _read_schema(store_path):
+    with open(os.path.join(store_path, "schema.json")) as f:
+        return json.load(f)
+
+
+def store_schema(path=COUNTY_CSV, cache_dir=CACHE_DIR):
+    """Row count and per-column kind/dtype of the store for `path`."""
+    return _read_schema(county_store(path, cache_dir))
+
+
+@traced()
+def load_counties(columns=None, path=COUNTY_CSV, cache_dir=CACHE_DIR):
+    """The county table as a DataFrame with only `columns` (default: all), in the store's types."""
+    store_path = county_store(path, cache_dir)
+    schema = _read_schema(store_path)['columns']
+    columns = list(schema) if columns is None else list(columns)
+    missing = [c for c in columns if c not in schema]
+    if missing:
+        raise KeyError(f"Columns {missing} are not in {os.path.basename(path)}; available: {list(schema)}")
+
+    data = {}
+    for name in columns:
+        entry = schema[name]
+        prefix = os.path.join(store_path, entry['file'])
+        if entry['kind'] == 'category':
+            labels = np.load(f"{prefix}.labels.npy")
+            data[name] = pd.Categorical.from_codes(np.load(f"{prefix}.codes.npy", mmap_mode='r'), labels)
+        else:
+            data[name] = np.load(f"{prefix}.values.npy", mmap_mode='r')
+    return pd.DataFrame(data, columns=columns)
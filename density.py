@@ -0,0 +1,114 @@
+import os
+import numpy as np
+from scipy.signal import fftconvolve
+from scipy.stats import gaussian_kde
+from disk_cache import array_key, load_npz, save_npz
+
+# === Binned 2-D KDE for the density backgrounds ===
+# sns.kdeplot evaluates every point's kernel at every grid node (n x 200 x 200 work). Here the points
+# are linearly binned onto the same 200 x 200 grid and the bins are convolved with the Gaussian kernel
+# by FFT, so the cost depends on the grid rather than the point count (counties or ~70k tracts alike).
+# Bandwidth, grid extent and iso-proportion levels follow seaborn, so kde_contour() draws the same
+# picture as `sns.kdeplot(fill=True, levels=..., thresh=...)`. Grids are cached in .cache/kde/ keyed by
+# the data and bandwidth, so rebuilding a report with unchanged data skips the estimate entirely.
+
+KDE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "kde")
+GRIDSIZE = 200
+CUT = 3
+
+
+def _linear_bin(x, y, weights, xgrid, ygrid):
+    # Split each point's weight between its 4 surrounding grid nodes; returns counts indexed [y, x]
+    dx, dy = xgrid[1] - xgrid[0], ygrid[1] - ygrid[0]
+    fx = np.clip((x - xgrid[0]) / dx, 0, len(xgrid) - 1)
+    fy = np.clip((y - ygrid[0]) / dy, 0, len(ygrid) - 1)
+    ix = np.minimum(fx.astype(int), len(xgrid) - 2)
+    iy = np.minimum(fy.astype(int), len(ygrid) - 2)
+    wx, wy = fx - ix, fy - iy
+    w = np.ones_like(x) if weights is None else weights
+    counts = np.zeros(len(ygrid) * len(xgrid))
+    for oy, ox, share in ((0, 0, (1 - wy) * (1 - wx)), (0, 1, (1 - wy) * wx),
+                          (1, 0, wy * (1 - wx)), (1, 1, wy * wx)):
+        counts += np.bincount((iy + oy) * len(xgrid) + ix + ox, w * share, minlength=counts.size)
+    return counts.reshape(len(ygrid), len(xgrid))
+
+
+def kde_grid(x, y, weights=None, bw_method='scott', bw_adjust=1, gridsize=GRIDSIZE, cut=CUT,
+             cache_dir=KDE_CACHE_DIR):
+    """Gaussian KDE of (x, y) on a gridsize x gridsize grid; returns (xgrid, ygrid, density[y, x]).
+
+    Pairs with a missing value are dropped. Pass cache_dir=None to skip the on-disk cache.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        keep &= ~np.isnan(weights)
+        weights = weights[keep] / weights[keep].sum()
+    x, y = x[keep], y[keep]
+    if len(x) < 2:
+        raise ValueError(f"A KDE needs at least 2 complete (x, y) pairs, got {len(x)}")
+
+    params = {'bw_method': bw_method, 'bw_adjust': bw_adjust, 'gridsize': gridsize, 'cut': cut}
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, f"{array_key((x, y, weights), params)}.npz")
+        cached = load_npz(cache_path)
+        if cached is not None:
+            return cached['xgrid'], cached['ygrid'], cached['density']
+
+    # Same bandwidth matrix as seaborn: scipy's rule of thumb scaled by bw_adjust
+    kde = gaussian_kde([x, y], bw_method=bw_method, weights=weights)
+    kde.set_bandwidth(kde.factor * bw_adjust)
+    cov = kde.covariance
+    bw = np.sqrt(np.diag(cov))
+    xgrid = np.linspace(x.min() - cut * bw[0], x.max() + cut * bw[0], gridsize)
+    ygrid = np.linspace(y.min() - cut * bw[1], y.max() + cut * bw[1], gridsize)
+
+    counts = _linear_bin(x, y, weights, xgrid, ygrid)
+    if weights is None:
+        counts /= len(x)
+
+    # Kernel on the grid offsets, out to 4 bandwidths (or the whole grid)
+    dx, dy = xgrid[1] - xgrid[0], ygrid[1] - ygrid[0]
+    lx = min(gridsize - 1, int(np.ceil(4 * bw[0] / dx)))
+    ly = min(gridsize - 1, int(np.ceil(4 * bw[1] / dy)))
+    ox, oy = np.meshgrid(np.arange(-lx, lx + 1) * dx, np.arange(-ly, ly + 1) * dy)
+    inv = np.linalg.inv(cov)
+    quad = inv[0, 0] * ox ** 2 + 2 * inv[0, 1] * ox * oy + inv[1, 1] * oy ** 2
+    kernel = np.exp(-0.5 * quad) / (2 * np.pi * np.sqrt(np.linalg.det(cov)))
+
+    density = np.clip(fftconvolve(counts, kernel, mode='same'), 0, None)
+
+    if cache_path is not None:
+        save_npz(cache_path, xgrid=xgrid, ygrid=ygrid, density=density)
+    return xgrid, ygrid, density
+
+
+def iso_levels(density, levels=10, thresh=0.05):
+    """Density values enclosing the given proportions of mass, as seaborn's `levels`/`thresh`."""
+    proportions = np.linspace(thresh, 1, levels) if np.isscalar(levels) else np.asarray(levels)
+    values = np.sort(np.ravel(density))[::-1]
+    cumulative = np.cumsum(values) / values.sum()
+    return np.take(values, np.searchsorted(cumulative, 1 - proportions), mode='clip')
+
+
+def transpose_grid(grid):
+    """kde_grid(y, x) from kde_grid(x, y): the estimate is symmetric in its two variables."""
+    xgrid, ygrid, density = grid
+    return ygrid, xgrid, density.T
+
+
+def draw_density(ax, grid, levels=10, thresh=0.05, fill=True, **contour_kws):
+    """Draw a kde_grid() result on `ax` as (filled) contours."""
+    xgrid, ygrid, density = grid
+    draw = ax.contourf if fill else ax.contour
+    return draw(xgrid, ygrid, density, levels=iso_levels(density, levels, thresh), **contour_kws)
+
+
+def kde_contour(ax, x, y, weights=None, levels=10, thresh=0.05, fill=True, bw_method='scott', bw_adjust=1,
+                gridsize=GRIDSIZE, cut=CUT, cache_dir=KDE_CACHE_DIR, **contour_kws):
+    """Draw the KDE of (x, y) on `ax` as (filled) contours; drop-in for sns.kdeplot(x=..., y=...)."""
+    grid = kde_grid(x, y, weights, bw_method, bw_adjust, gridsize, cut, cache_dir)
+    return draw_density(ax, grid, levels, thresh, fill, **contour_kws)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+
+# === On-disk caches under .cache/ ===
+# Cache entries are keyed by the content hash of their inputs and published atomically, so a reader
+# (or a second process building the same entry) never sees a half-written one.
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def publish_dir(path):
+    """Yield a temporary directory next to `path` to fill; on exit it is renamed into place as `path`."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path))
+    try:
+        yield tmp_dir
+        os.replace(tmp_dir, path)
+    except OSError:
+        # Another process may have published the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+
+
+# === Array results (.npz) ===
+
+
+def array_key(arrays, params):
+    """Hex digest of `params` and the float values of `arrays` (None entries are skipped)."""
+    digest = hashlib.sha256(repr(sorted(params.items())).encode('utf-8'))
+    for a in arrays:
+        if a is not None:
+            digest.update(np.ascontiguousarray(a, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def load_npz(path):
+    """The arrays saved at `path` as a dict, or None if there is no such entry."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        return dict(cached)
+
+
+def save_npz(path, **arrays):
+    """Save `arrays` to `path` through a temporary file, so readers never see a partial .npz."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
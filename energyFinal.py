@@ -1,64 +1,45 @@
 import os
-import pandas as pd
-import geopandas as gpd
+import argparse
 import folium
 from folium.features import DivIcon, GeoJsonTooltip, Popup
-import matplotlib.pyplot as plt
-from matplotlib.colors import Normalize
-import matplotlib.cm as cm
-import matplotlib.patheffects as path_effects
-import base64
-from io import BytesIO
-
-# === Load US States GeoJSON ===
-us_states = gpd.read_file("https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json")
-
-# === Load Consumption Data ===
-consumption_df = pd.read_csv("energy_indicators.csv")
-consumption_df['abbreviation'] = consumption_df['State'].str.strip().str.upper()
-consumption_df = consumption_df[~consumption_df['abbreviation'].str.contains('TOTAL', case=False, na=False)]
-consumption_df = consumption_df[~consumption_df['abbreviation'].isin(['US', 'TOTAL US'])]
-consumption_df['2022'] = consumption_df['2022'].astype(str).str.replace(',', '', regex=False).astype(float)
-consumption_2022 = consumption_df.groupby('abbreviation').agg({'2022': 'sum'}).reset_index().rename(columns={'2022': 'consumption'})
-
-# === Load Energy Production Data ===
-energy_df = pd.read_csv("Energy_Production.csv")
-energy_df = energy_df[['State', 'MSN', '2022']]
-
-# Map MSN codes to energy types
-msn_to_type = {
-    'CLPRB': 'Coal', 'CLPRK': 'Coal', 'CLPRP': 'Coal',
-    'NGMPB': 'Natural Gas', 'NGMPK': 'Natural Gas', 'NGMPP': 'Natural Gas',
-    'NUEGP': 'Nuclear', 'NUETB': 'Nuclear',
-    'WYTCB': 'Wind'
-}
-energy_df['Energy_Type'] = energy_df['MSN'].map(msn_to_type)
-energy_df = energy_df[energy_df['Energy_Type'].notna()]
-energy_df['abbreviation'] = energy_df['State'].str.strip().str.upper()
-energy_df['2022'] = energy_df['2022'].astype(str).str.replace(',', '', regex=False).astype(float)
-
-# Aggregate production breakdown
-energy_breakdown = energy_df.groupby(['abbreviation', 'Energy_Type']).agg({'2022': 'sum'}).reset_index()
-energy_pivot = energy_breakdown.pivot(index='abbreviation', columns='Energy_Type', values='2022').reset_index().fillna(0)
-energy_pivot['total_production'] = energy_pivot[['Coal', 'Natural Gas', 'Nuclear', 'Wind']].sum(axis=1)
-
-# === Merge with consumption
-state_data = pd.merge(consumption_2022, energy_pivot, on='abbreviation', how='left')
-state_data['vulnerability_score'] = round(
-    (state_data['consumption'] - state_data['total_production']) / state_data['consumption'], 2
+from seds_pipeline import state_energy_by_year
+from build import cached_frame
+from msn_catalog import BTU
+from state_geometry import load_states
+from geo_export import folium_layer
+from instrument import stage
+from time_slider import delta_encode, add_time_slider
+from popup_charts import (
+    render_charts, pie_chart, write_chart_files, lazy_img, enable_lazy_popup_images,
+    energy_mix_payload, svg_chart_placeholder, enable_svg_popup_charts
 )
-state_data['vulnerability_score'] = state_data['vulnerability_score'].clip(lower=0).fillna(0)
-
-# Define High/Medium/Low category
-state_data['prod_cons_ratio'] = state_data['total_production'] / state_data['consumption']
-def category(ratio):
-    if ratio >= 1.2:
-        return 'High Producer'
-    elif ratio >= 0.8:
-        return 'Medium'
-    else:
-        return 'Low Producer'
-state_data['category'] = state_data['prod_cons_ratio'].apply(category)
+
+# 'year': the YEAR map with pie-chart popups; 'timeline': every year behind a year slider, with the state
+# geometry written once and only the per-year property changes shipped (see time_slider.py)
+MAP_MODES = {'year': "docs/energy_production_map.html", 'timeline': "docs/energy_production_timeline.html"}
+parser = argparse.ArgumentParser(description="Energy production vs. consumption map by state.")
+parser.add_argument('--mode', choices=list(MAP_MODES), default='year',
+                    help="'year': one year with pie-chart popups; 'timeline': every year behind a slider")
+MAP_MODE = parser.parse_args().mode
+OUTPUT = MAP_MODES[MAP_MODE]
+
+# === Load US States geometry (bundled, with precomputed centroids) ===
+with stage('load_geometry'):
+    us_states = load_states('medium')
+
+# === Production vs. Consumption for every SEDS year (1960-2022) ===
+YEAR = 2022
+
+# Energy sources to map; their production series and units come from data/msn_catalog.csv
+energy_types = ['Coal', 'Natural Gas', 'Nuclear', 'Wind']
+with stage('aggregate'):
+    # Cached between builds until the SEDS files, the MSN catalog or the pipeline code change
+    state_data_by_year = cached_frame(
+        'state_energy', state_energy_by_year,
+        inputs=["Energy_Production.csv", "totalconsumption.csv", "data/msn_catalog.csv"],
+        production_path="Energy_Production.csv", consumption_path="totalconsumption.csv", types=energy_types,
+    )
+    state_data = state_data_by_year[state_data_by_year['year'] == YEAR].drop(columns='year').reset_index(drop=True)
 
 # === Map full state names to abbreviations
 abbreviation_map = {
@@ -75,75 +56,96 @@ abbreviation_map = {
 us_states['abbreviation'] = us_states['name'].map(abbreviation_map)
 
 # === Merge GeoDataFrame
-merged = us_states.merge(state_data, on='abbreviation', how='left')
-
-merged['centroid'] = merged.geometry.centroid
-merged['longitude'] = merged['centroid'].x
-merged['latitude'] = merged['centroid'].y
-merged = merged.drop(columns=['centroid'])
+with stage('merge'):
+    merged = us_states.merge(state_data, on='abbreviation', how='left')
 
 # === INTERACTIVE MAP ===
 m = folium.Map(location=[37.8, -96], zoom_start=4)
 
 # Define color function for categories
+CATEGORY_COLORS = {
+    'High Producer': '#006d2c',  # dark green
+    'Medium': '#fd8d3c',  # orange
+    'Low Producer': '#a50f15',  # dark red
+}
+
 def color_function(feature):
-    category = feature['properties']['category']
-    if category == 'High Producer':
-        return '#006d2c'  # dark green
-    elif category == 'Medium':
-        return '#fd8d3c'  # orange
-    elif category == 'Low Producer':
-        return '#a50f15'  # dark red
-    else:
-        return 'gray'
-
-# Add states GeoJson
-folium.GeoJson(
-    merged.to_json(),
-    style_function=lambda feature: {
-        'fillColor': color_function(feature),
-        'color': 'black',
-        'weight': 1,
-        'fillOpacity': 0.6,
-    },
-    tooltip=GeoJsonTooltip(
-        fields=[
-            "name", "total_production", "consumption", "category", "vulnerability_score",
-            "Coal", "Natural Gas", "Nuclear", "Wind"
-        ],
-        aliases=[
-            "State:", "Total Production (GWh):", "Consumption (GWh):", "Category:", "Vulnerability Score:",
-            "Coal (GWh):", "Natural Gas (GWh):", "Nuclear (GWh):", "Wind (GWh):"
-        ],
-        localize=True,
-        sticky=True,
-        labels=True,
-        style="background-color: white; color: black; font-size: 12px; border: 1px solid gray; padding: 5px;"
+    return CATEGORY_COLORS.get(feature['properties']['category'], 'gray')
+
+# Add states layer: only the tooltip/style fields are exported, 'topojson' stores shared borders once
+GEO_FORMAT = 'topojson'
+tooltip_fields = [
+    "name", "total_production", "consumption", "category", "vulnerability_score",
+    "Coal", "Natural Gas", "Nuclear", "Wind"
+]
+# The slider matches features to its per-year values by abbreviation
+layer_fields = tooltip_fields + ['abbreviation'] if MAP_MODE == 'timeline' else tooltip_fields
+with stage('states_layer'):
+    states_layer = folium_layer(
+        merged, layer_fields, GEO_FORMAT,
+        style_function=lambda feature: {
+            'fillColor': color_function(feature),
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.6,
+        },
+        tooltip=GeoJsonTooltip(
+            fields=tooltip_fields,
+            aliases=[
+                "State:", f"Total Production ({BTU}):", f"Consumption ({BTU}):", "Category:", "Vulnerability Score:",
+                *[f"{e} ({BTU}):" for e in energy_types]
+            ],
+            localize=True,
+            sticky=True,
+            labels=True,
+            style="background-color: white; color: black; font-size: 12px; border: 1px solid gray; padding: 5px;"
+        )
     )
-).add_to(m)
-
-# === Pie Chart per state popup ===
-os.makedirs("docs/pies", exist_ok=True)
-
-for _, row in merged.iterrows():
-    if row['total_production'] > 0:
-        labels = ['Coal', 'Natural Gas', 'Nuclear', 'Wind']
-        sizes = [row.get('Coal', 0), row.get('Natural Gas', 0), row.get('Nuclear', 0), row.get('Wind', 0)]
-        colors_pie = ['#636363', '#3182bd', '#fd8d3c', '#31a354']
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, colors=colors_pie, autopct='%1.1f%%', startangle=140)
-        ax.axis('equal')
-        plt.title(f"{row['abbreviation']} Production Breakdown")
-
-        buf = BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-
-        html = f'<img src="data:image/png;base64,{img_base64}" width="250" height="250">'
-        iframe = folium.IFrame(html, width=270, height=270)
-        popup = Popup(iframe, max_width=270)
+    states_layer.add_to(m)
+
+# === Year slider (timeline map) ===
+if MAP_MODE == 'timeline':
+    with stage('time_slider'):
+        timeline = delta_encode(
+            state_data_by_year[state_data_by_year['abbreviation'].isin(merged['abbreviation'])],
+            'abbreviation', 'year',
+            numeric={'total_production': 0, 'consumption': 0, 'vulnerability_score': 2, **{e: 0 for e in energy_types}},
+            categorical=['category'],
+        )
+        add_time_slider(m, states_layer, timeline, 'category', CATEGORY_COLORS, start=YEAR)
+
+# === Pie Chart per state popup (single-year map) ===
+if MAP_MODE == 'year':
+    # 'files': PNGs in docs/pies/ fetched when a popup opens, 'inline': base64 PNGs embedded in the page,
+    # 'svg': only the energy-mix numbers are embedded and the pie is drawn in the browser
+    POPUP_CHARTS = 'files'
+
+    labels = energy_types
+    producers = merged[merged['total_production'] > 0]
+
+    if POPUP_CHARTS == 'svg':
+        enable_svg_popup_charts(m, energy_mix_payload(producers, labels))
+    else:
+        # Render all state pies across worker processes, returned in row order
+        with stage('render_charts'):
+            pie_images = render_charts(pie_chart, [
+                {'abbreviation': row['abbreviation'], 'labels': labels, 'sizes': [row.get(e, 0) for e in labels]}
+                for _, row in producers.iterrows()
+            ])
+        if POPUP_CHARTS == 'files':
+            with stage('write_charts'):
+                pie_urls = write_chart_files(pie_images, producers['abbreviation'], "docs/pies", "pies")
+            enable_lazy_popup_images(m)
+
+    for i, (_, row) in enumerate(producers.iterrows()):
+        if POPUP_CHARTS == 'svg':
+            title = f"{row['abbreviation']} Production Breakdown"
+            popup = Popup(svg_chart_placeholder('pie', row['abbreviation'], title, 250, 250), max_width=270)
+        elif POPUP_CHARTS == 'inline':
+            html = f'<img src="data:image/png;base64,{pie_images[i]}" width="250" height="250">'
+            popup = Popup(folium.IFrame(html, width=270, height=270), max_width=270)
+        else:
+            popup = Popup(lazy_img(pie_urls[i], 250, 250), max_width=270)
 
         folium.Marker(
             location=[row['latitude'], row['longitude']],
@@ -176,5 +178,6 @@ m.get_root().html.add_child(folium.Element(legend_html))
 
 # Save interactive map
 os.makedirs("docs", exist_ok=True)
-m.save("docs/energy_production_map.html")
-print("✅ Enhanced map with legend saved to docs/energy_production_map.html")
+with stage('save'):
+    m.save(OUTPUT)
+print(f"✅ Enhanced map with legend saved to {OUTPUT}")
@@ -1,6 +1,5 @@
 import os
 import pandas as pd
-import geopandas as gpd
 import folium
 from folium.features import DivIcon, GeoJsonTooltip
 import matplotlib.pyplot as plt
@@ -8,9 +7,10 @@ from matplotlib.colors import Normalize
 import matplotlib.cm as cm
 import matplotlib.patheffects as path_effects
 from shapely.geometry import Point
+from state_geometry import load_states
 
-# === Load US States GeoJSON from GitHub ===
-us_states = gpd.read_file("https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json")
+# === Load US States geometry (bundled, with precomputed centroids) ===
+us_states = load_states('full')
 
 # === Dummy Energy Production Data ===
 state_energy = pd.DataFrame({
@@ -25,14 +25,6 @@ state_energy['total'] = state_energy[['coal', 'solar', 'wind', 'hydro']].sum(axi
 # === Merge GeoDataFrame with Energy Data ===
 merged = us_states.merge(state_energy, on='name')
 
-# === Calculate Centroids for Labeling ===
-merged['centroid'] = merged.geometry.centroid
-merged['longitude'] = merged['centroid'].x
-merged['latitude'] = merged['centroid'].y
-
-# Remove the centroid column before passing to GeoJSON serialization
-merged = merged.drop(columns=['centroid'])
-
 # === INTERACTIVE MAP ===
 m = folium.Map(location=[37.8, -96], zoom_start=4)
 
@@ -0,0 +1,69 @@
+import numpy as np
+
+# === Vectorized state energy metrics ===
+# Every kernel works on plain arrays of any shape (states, states x years, scenarios x states x years, ...)
+# and broadcasts like NumPy does, so there are no row-wise apply/lambda passes.
+
+CATEGORY_BINS = [0.8, 1.2]
+CATEGORY_LABELS = np.array(['Low Producer', 'Medium', 'High Producer'])
+BALANCED_TOLERANCE = 0.05
+
+
+def total_production(production, axis=-1):
+    return np.sum(production, axis=axis)
+
+
+def energy_shares(production, total, axis=-1):
+    # Percent of total production per energy type, rounded to 0.1 and 0 where total is 0/NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.round(production / np.expand_dims(total, axis) * 100, 1)
+    return np.nan_to_num(pct, nan=0.0)
+
+
+def prod_cons_ratio(total, consumption):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.asarray(total, dtype=float) / consumption
+
+
+def vulnerability_score(total, consumption):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.round((consumption - np.asarray(total, dtype=float)) / consumption, 2)
+    return np.nan_to_num(np.clip(score, 0, None), nan=0.0)
+
+
+def category(ratio):
+    ratio = np.asarray(ratio, dtype=float)
+    labels = CATEGORY_LABELS[np.digitize(ratio, CATEGORY_BINS)]
+    return np.where(np.isnan(ratio), CATEGORY_LABELS[0], labels)
+
+
+def status(total, consumption):
+    total = np.asarray(total, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    return np.select(
+        [total > consumption, np.abs(total - consumption) < BALANCED_TOLERANCE * consumption],
+        ['Exporter', 'Balanced'],
+        default='Importer',
+    )
+
+
+def add_energy_metrics(df, types):
+    """Fill in totals, ratio, category, status, vulnerability and *_pct shares on a state frame."""
+    df = df.copy()
+    production = df[types].to_numpy(dtype=float)
+    consumption = df['consumption'].to_numpy(dtype=float)
+
+    total = total_production(np.nan_to_num(production))
+    # Rows with no production data at all keep a NaN total, as after the left merge in the scripts
+    total[np.isnan(production).all(axis=-1)] = np.nan
+    ratio = prod_cons_ratio(total, consumption)
+
+    df['total_production'] = total
+    df['vulnerability_score'] = vulnerability_score(total, consumption)
+    df['prod_cons_ratio'] = ratio
+    df['category'] = category(ratio)
+    df['status'] = status(total, consumption)
+    pct = energy_shares(production, total)
+    for i, e_type in enumerate(types):
+        df[f'{e_type}_pct'] = pct[:, i]
+    return df
@@ -1,29 +1,19 @@
 # 📚 Import libraries
-import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
+from county_aggregates import load_aggregates
+from regression_band import regression_band
 
-# 🗂️ Load the dataset
-df = pd.read_csv('df_final.csv')
-
-# ✨ Group data by state and take the mean
-df_state = df.groupby('state_name').agg({
-    'percent_below_poverty': 'mean',
-    'ch_fi_rate_18': 'mean'
-}).reset_index()
+# ✨ State means of the county values, read from the precomputed state aggregates
+# (load_aggregates('weighted_mean', ...) gives population-weighted ones)
+df_state = load_aggregates('mean', ['percent_below_poverty', 'ch_fi_rate_18']).reset_index()
 
 # 🔍 Quick preview
 print(df_state.head())
 
 # 📈 Scatter plot: State Average Poverty vs Child Food Insecurity
-plt.figure(figsize=(14, 8))
-sns.regplot(
-    data=df_state,
-    x='percent_below_poverty', 
-    y='ch_fi_rate_18',
-    scatter_kws={'s':100, 'color':'blue', 'alpha':0.7},
-    line_kws={'color':'red'}
-)
+fig, ax = plt.subplots(figsize=(14, 8))
+ax.scatter(df_state['percent_below_poverty'], df_state['ch_fi_rate_18'], s=100, color='blue', alpha=0.7)
+regression_band(ax, df_state['percent_below_poverty'], df_state['ch_fi_rate_18'], color='red')
 
 # Annotate points with state names
 for i in range(df_state.shape[0]):
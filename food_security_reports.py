@@ -0,0 +1,466 @@
+import os
+import pickle
+from collections import deque
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.lines import Line2D
+from instrument import stage
+from county_store import COUNTY_CSV, load_counties
+from county_aggregates import load_aggregates
+from density import kde_grid, transpose_grid, draw_density
+from regression_band import fit_band, draw_band
+from pdf_layers import pdf_layer, save_page
+from build import cached_frame
+from workers import process_pool, use_agg
+
+# === Food-security PDF reports, built together ===
+# Each report variant is a configuration in REPORTS. build_reports() loads and cleans the county
+# columns once, estimates each density grid and regression fit once (variants that plot the same two
+# columns, in either order, share them), then writes every variant's PDF, one worker process per
+# report. df_final.py and food_insecurity_highschool.py build a single variant through the same code.
+# build_state_reports() writes the standard chart once per state (see "Per-state reports" below).
+
+# Columns used by the reports; counties missing any of them are left out
+COLUMNS = [
+    'ch_fi_rate_18',
+    'percent_children_in_poverty',
+    'percent_limited_access_to_healthy_foods',
+    'high_school_graduation_rate',
+    'percent_low_birthweight',
+    'median_household_income',
+]
+
+# 'hybrid': the density and scatter layers are embedded as images (small, fast-opening PDF), the rest
+# stays vector; 'vector': every contour and marker is written as a path
+PDF_MODE = 'hybrid'
+
+STANDARD_INSIGHTS = """
+Key Insights
+The chart reveals a strong, positive correlation between child food insecurity and childhood poverty:
+as food insecurity rates rise, so do poverty rates. Communities with lower median household incomes and
+lower high school graduation rates are disproportionately impacted, as indicated by smaller, darker red circles.
+
+Urgency of Action
+Child food insecurity is not just a symptom of poverty—it is a driver of long-term economic and health hardship.
+Without immediate intervention, children facing food insecurity today are at greater risk of malnutrition, starvation,
+poor educational outcomes, and reduced future earning potential. The physical and cognitive effects of inadequate
+nutrition during childhood can permanently undermine a child's ability to succeed later in life, compounding the cycle
+of poverty across generations.
+
+Call to Action
+Addressing child food insecurity aligns directly with the Senator’s priorities of promoting economic stability
+and educational opportunity. By investing in policies that ensure children have consistent access to nutritious food,
+we can break the cycle of poverty and secure a stronger, more equitable future for all Americans.
+"""
+
+IMPROVED_INSIGHTS = """
+Key Insights
+The chart reveals a strong, positive correlation between child food insecurity and childhood poverty:
+as food insecurity rates rise, so do poverty rates. Communities with lower median household incomes and
+lower high school graduation rates are disproportionately impacted.
+
+Graduation rates are bucketed as Low (≤75%), Medium (76-85%), and High (>85%):
+- Purple edges highlight the lowest graduation regions
+- Amber edges mark medium rates
+- Teal edges show high performing areas.
+
+Urgency of Action
+Child food insecurity is not just a symptom of poverty—it is a driver of long-term economic and health hardship.
+Without immediate intervention, children facing food insecurity today are at greater risk of malnutrition, starvation,
+poor educational outcomes, and reduced future earning potential.
+
+Call to Action
+Addressing child food insecurity aligns directly with the Senator’s priorities of promoting economic stability
+and educational opportunity. By investing in policies that ensure children have consistent access to nutritious food,
+we can break the cycle of poverty and secure a stronger, more equitable future for all Americans.
+"""
+
+REPORTS = {
+    # Food_Security_Report.pdf: points colored by food access and sized by low birthweight
+    'standard': {
+        'output': 'Food_Security_Report.pdf',
+        'x': 'ch_fi_rate_18',
+        'y': 'percent_children_in_poverty',
+        'points': 'food_access',
+        'density_alpha': 0.3,
+        'title': 'Child Food Insecurity vs. Childhood Poverty',
+        'xlabel': 'Child Food Insecurity Rate (%)',
+        'ylabel': 'Percent of Children in Poverty (%)',
+        'subtitle': "Communities with higher child food insecurity face greater poverty,\n"
+                    "limited access to healthy foods, and early signs of malnutrition.",
+        'insights': STANDARD_INSIGHTS,
+        'done': "✅ Food_Security_Report.pdf successfully created!",
+    },
+    # Food_Security_Report_Improved.pdf: points colored by income, sized and edged by graduation rate
+    'improved': {
+        'output': 'Food_Security_Report_Improved.pdf',
+        'x': 'percent_children_in_poverty',
+        'y': 'ch_fi_rate_18',
+        'points': 'income_graduation',
+        'density_alpha': 0.6,
+        'title': 'Child Food Insecurity vs. Childhood Poverty',
+        'xlabel': 'Percent of Children in Poverty (%)',
+        'ylabel': 'Child Food Insecurity Rate (%)',
+        'subtitle': None,
+        'insights': IMPROVED_INSIGHTS,
+        'done': "Food_Security_Report_Improved.pdf successfully created!",
+    },
+}
+
+
+# === Shared inputs ===
+
+def report_counties():
+    """State and report columns of the counties that have every report column."""
+    return load_counties(['state_name'] + COLUMNS).dropna(subset=COLUMNS)
+
+
+def load_report_counties():
+    # Shared by the variant and per-state builds, cached until df_final.csv or this module changes
+    return cached_frame('report_counties', report_counties, inputs=[COUNTY_CSV])
+
+
+def shared_inputs(reports, counties=None):
+    """Cleaned county frame plus the density grid and regression fit of every (x, y) pair in `reports`."""
+    if counties is None:
+        with stage('load'):
+            counties = load_report_counties()
+    with stage('clean'):
+        counties = counties.dropna(subset=COLUMNS)
+
+    densities, fits = {}, {}
+    with stage('kde'):
+        for cfg in reports:
+            pair = (cfg['x'], cfg['y'])
+            if pair in densities:
+                continue
+            if pair[::-1] in densities:
+                densities[pair] = transpose_grid(densities[pair[::-1]])
+            else:
+                densities[pair] = kde_grid(counties[cfg['x']], counties[cfg['y']])
+    with stage('regression'):
+        for cfg in reports:
+            pair = (cfg['x'], cfg['y'])
+            if pair not in fits:
+                fits[pair] = fit_band(counties[cfg['x']], counties[cfg['y']])
+    return {'counties': counties, 'density': densities, 'fit': fits}
+
+
+# === Pages ===
+
+def cover_page(pdf):
+    fig_cover, ax_cover = plt.subplots(figsize=(11, 8.5))
+    ax_cover.axis('off')
+    ax_cover.text(0.5, 0.7, 'Story - 6:', fontsize=28, weight='bold', ha='center')
+    ax_cover.text(0.5, 0.6, 'What Is The State of Food Security and Nutrition in the US', fontsize=22, ha='center')
+    ax_cover.text(0.5, 0.45, 'CLASS DATA 608', fontsize=18, ha='center')
+    ax_cover.text(0.5, 0.35, 'UMAIS SIDDIQUI', fontsize=18, ha='center')
+    pdf.savefig(fig_cover)
+    plt.close(fig_cover)
+
+
+def insights_page(pdf, text):
+    fig_insights, ax_insights = plt.subplots(figsize=(11, 8.5))
+    ax_insights.axis('off')
+    ax_insights.text(0.5, 0.5, text, fontsize=12, ha='center', va='center', wrap=True)
+    pdf.savefig(fig_insights)
+    plt.close(fig_insights)
+
+
+def food_access_points(fig, ax, df, cfg):
+    sns.scatterplot(
+        data=df,
+        x=cfg['x'],
+        y=cfg['y'],
+        hue='percent_limited_access_to_healthy_foods',  # Coloring by food desert percentage
+        size='percent_low_birthweight',                 # Sizing by low birthweight
+        palette='Spectral_r',                           # Colorblind-friendly palette
+        sizes=(80, 300),
+        alpha=0.85,
+        edgecolor='black',
+        linewidth=0.7,
+        ax=ax
+    )
+    points = ax.collections[-1]
+
+    def legend():
+        ax.legend(
+            title='Limited Access to Healthy Foods (%)\n(Size = % Low Birthweight)',
+            bbox_to_anchor=(1.05, 1),
+            loc='upper left',
+            borderaxespad=0,
+            fontsize=10,
+            title_fontsize=11
+        )
+    return points, legend
+
+
+# Graduation rate buckets (upper bound, label, color-blind safe edge color)
+GRADUATION_BUCKETS = [
+    (75, 'Low (≤75%)', '#7b3294'),       # Dark purple (safe)
+    (85, 'Medium (76-85%)', '#fdb863'),  # Amber/Gold (high contrast)
+    (np.inf, 'High (>85%)', '#1b9e77'),  # Teal/Blue-green (safe)
+]
+
+
+def income_graduation_points(fig, ax, df, cfg):
+    # Circle sizes scale with high school graduation rate, edge colors mark its bucket
+    rate = df['high_school_graduation_rate'].to_numpy(dtype=float)
+    sizes = np.interp(rate, (rate.min(), rate.max()), (100, 600))
+    bucket = np.searchsorted([upper for upper, _, _ in GRADUATION_BUCKETS], rate, side='left')
+    edge_colors = np.array([color for _, _, color in GRADUATION_BUCKETS])[bucket]
+    income = df['median_household_income']
+    points = ax.scatter(
+        df[cfg['x']],
+        df[cfg['y']],
+        c=income,
+        cmap='coolwarm_r',
+        norm=plt.Normalize(income.min(), income.max()),
+        s=sizes,
+        alpha=0.85,
+        edgecolor=edge_colors,
+        linewidth=2.5  # Thicker edges for visibility
+    )
+
+    def legend():
+        # Colorbar for household income
+        cbar = plt.colorbar(points, ax=ax, pad=0.02)
+        cbar.set_label('Median Household Income ($)', fontsize=11, weight='bold')
+        # Custom legend for graduation buckets, with no line through the circles
+        legend_elements = [
+            Line2D([0], [0], marker='o', linestyle='None', label=label,
+                   markerfacecolor='none', markeredgecolor=color,
+                   markersize=14, markeredgewidth=3)
+            for _, label, color in GRADUATION_BUCKETS
+        ]
+        legend = ax.legend(
+            handles=legend_elements,
+            title='HS Graduation Rate',
+            loc='upper left',
+            bbox_to_anchor=(0, 1.05),
+            fontsize=10,
+            title_fontsize=11,
+            frameon=True,
+        )
+        legend.get_frame().set_facecolor('white')
+        legend.get_frame().set_edgecolor('black')
+        for text in legend.get_texts():
+            text.set_color("black")
+        legend.get_title().set_color("black")
+    return points, legend
+
+
+POINT_STYLES = {'food_access': food_access_points, 'income_graduation': income_graduation_points}
+
+
+def chart_figure(cfg, shared, pdf_mode=PDF_MODE):
+    """The chart page of a report as a figure; density or fit missing from `shared` are left out."""
+    pair = (cfg['x'], cfg['y'])
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    # Background density heatmap
+    if pair in shared['density']:
+        pdf_layer(draw_density(ax, shared['density'][pair], levels=100, thresh=0, cmap="Blues",
+                               alpha=cfg['density_alpha']), 'density', pdf_mode)
+    with stage('scatter'):
+        points, legend = POINT_STYLES[cfg['points']](fig, ax, shared['counties'], cfg)
+    pdf_layer(points, 'scatter', pdf_mode)
+    # Dark dashed regression line
+    if pair in shared['fit']:
+        draw_band(ax, shared['fit'][pair], color='black', line_kws={"linewidth": 3, "linestyle": "dashed"})
+
+    ax.set_title(cfg['title'], fontsize=18, weight='bold')
+    ax.set_xlabel(cfg['xlabel'], fontsize=13, weight='bold')
+    ax.set_ylabel(cfg['ylabel'], fontsize=13, weight='bold')
+    if cfg['subtitle']:
+        fig.suptitle(cfg['subtitle'], fontsize=13, y=0.94, color='dimgray')
+    legend()
+
+    fig.subplots_adjust(top=0.88, bottom=0.15, left=0.08, right=0.8)
+    fig.tight_layout()
+    return fig
+
+
+def chart_page(pdf, cfg, shared, pdf_mode=PDF_MODE):
+    fig = chart_figure(cfg, shared, pdf_mode)
+    with stage('save_chart'):
+        save_page(pdf, fig, pdf_mode)
+    plt.close(fig)
+
+
+def write_report(cfg, shared, pdf_mode=PDF_MODE):
+    sns.set(style='whitegrid', font_scale=1.2)
+    with PdfPages(cfg['output']) as pdf:
+        cover_page(pdf)
+        chart_page(pdf, cfg, shared, pdf_mode)
+        insights_page(pdf, cfg['insights'])
+    print(cfg['done'])
+    return cfg['output']
+
+
+# === Batch ===
+
+def _write_job(job):
+    return write_report(*job)
+
+
+def build_reports(names=None, processes=None, pdf_mode=PDF_MODE):
+    """Write the PDFs of the `names` variants of REPORTS (default: all) from one data pass; returns their paths."""
+    names = list(REPORTS) if names is None else list(names)
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        raise KeyError(f"Unknown reports {unknown}; expected some of {list(REPORTS)}")
+    reports = [REPORTS[n] for n in names]
+    shared = shared_inputs(reports)
+
+    jobs = [(cfg, shared, pdf_mode) for cfg in reports]
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    if processes <= 1:
+        return [_write_job(job) for job in jobs]
+    with process_pool(processes, initializer=use_agg) as pool:
+        return list(pool.map(_write_job, jobs))
+
+
+# === Per-state reports ===
+# One page per state: the standard chart restricted to the state's counties, with the state's
+# aggregates (county_aggregates.py) in a box beside it. The county frame is loaded and split by
+# state_name once; each worker gets only its state's rows, renders the page, writes the state's PDF and
+# sends the pickled figure back. The parent appends the figures in state order to one combined PDF that
+# opens with an index page, keeping at most STATE_WINDOW pages per worker in flight.
+
+STATE_DIR = os.path.join('output', 'food_security_states')
+STATE_COMBINED = os.path.join('output', 'Food_Security_Report_States.pdf')
+STATE_WINDOW = 2
+# States with fewer complete counties get no density background, and with fewer than 2 no regression line
+MIN_DENSITY_COUNTIES = 5
+
+# Population-weighted state averages shown beside each state's chart (column, label, format)
+STATE_SUMMARY = [
+    ('ch_fi_rate_18', 'Child food insecurity', '{:.1f}%'),
+    ('percent_children_in_poverty', 'Children in poverty', '{:.1f}%'),
+    ('percent_limited_access_to_healthy_foods', 'Limited access to healthy foods', '{:.1f}%'),
+    ('median_household_income', 'Median household income', '${:,.0f}'),
+]
+
+
+def state_summary(state, counties, aggregates):
+    """Text box contents: the state's population-weighted averages and its charted county count."""
+    row = aggregates.loc[state]
+    lines = [f"{label}: {fmt.format(row[col])}" for col, label, fmt in STATE_SUMMARY]
+    return "\n".join([f"{state} (population-weighted)", *lines, f"Counties charted: {counties}"])
+
+
+def state_inputs(cfg, counties):
+    """shared_inputs() for one state's cleaned counties, leaving out what too few counties can't support."""
+    pair = (cfg['x'], cfg['y'])
+    x, y = counties[cfg['x']], counties[cfg['y']]
+    densities, fits = {}, {}
+    if len(counties) >= MIN_DENSITY_COUNTIES:
+        with stage('kde'):
+            densities[pair] = kde_grid(x, y)
+    if len(counties) >= 2 and x.nunique() > 1:
+        with stage('regression'):
+            fits[pair] = fit_band(x, y)
+    return {'counties': counties, 'density': densities, 'fit': fits}
+
+
+def state_file(state, out_dir=STATE_DIR):
+    return os.path.join(out_dir, f"Food_Security_{state.replace(' ', '_')}.pdf")
+
+
+def index_page(pdf, states, first_page):
+    """Index of the combined report: every state with its page number, in columns."""
+    fig, ax = plt.subplots(figsize=(11, 8.5))
+    ax.axis('off')
+    ax.text(0.5, 0.97, 'Food Security by State', fontsize=22, weight='bold', ha='center', va='top')
+    per_column = 18
+    for i, state in enumerate(states):
+        column, line = divmod(i, per_column)
+        x, y = 0.02 + column * 0.34, 0.86 - line * 0.047
+        ax.text(x, y, state, fontsize=12, va='top')
+        ax.text(x + 0.28, y, str(first_page + i), fontsize=12, ha='right', va='top')
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def _state_job(job):
+    state, counties, summary, path, pdf_mode = job
+    sns.set(style='whitegrid', font_scale=1.2)
+    cfg = dict(REPORTS['standard'], title=f"{state}: Child Food Insecurity vs. Childhood Poverty",
+               subtitle=None)
+    fig = chart_figure(cfg, state_inputs(cfg, counties), pdf_mode)
+    fig.axes[0].text(1.05, 0, summary, transform=fig.axes[0].transAxes, ha='left', va='bottom', fontsize=10,
+                     bbox={'boxstyle': 'round', 'facecolor': 'white', 'edgecolor': 'gray'})
+    fig.tight_layout()
+    with stage('save_chart'), PdfPages(path) as pdf:
+        save_page(pdf, fig, pdf_mode)
+    page = pickle.dumps(fig)
+    plt.close(fig)
+    return page
+
+
+def _bounded_map(pool, func, jobs, window):
+    # Like pool.map, but with at most `window` jobs submitted and not yet consumed at any time
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(func, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build_state_reports(states=None, processes=None, out_dir=STATE_DIR, combined=STATE_COMBINED,
+                        pdf_mode=PDF_MODE):
+    """Write one PDF per state (default: every state in df_final) and the combined PDF; returns its path."""
+    with stage('load'):
+        counties = load_report_counties()
+    with stage('clean'):
+        counties = counties.dropna(subset=['state_name'])
+        counties['state_name'] = counties['state_name'].astype(str)
+    with stage('partition'):
+        groups = dict(list(counties.groupby('state_name', sort=True)))
+    states = sorted(groups) if states is None else list(states)
+    unknown = [s for s in states if s not in groups]
+    if unknown:
+        raise KeyError(f"No counties with complete report columns for {unknown}")
+    aggregates = load_aggregates('weighted_mean', [col for col, _, _ in STATE_SUMMARY])
+
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.dirname(combined):
+        os.makedirs(os.path.dirname(combined), exist_ok=True)
+
+    def jobs():
+        # Rows are handed over (and dropped here) state by state as the window advances
+        for state in states:
+            rows = groups.pop(state)
+            yield state, rows, state_summary(state, len(rows), aggregates), state_file(state, out_dir), pdf_mode
+
+    processes = min(processes or os.cpu_count() or 1, len(states))
+    sns.set(style='whitegrid', font_scale=1.2)
+    with PdfPages(combined) as pdf:
+        index_page(pdf, states, first_page=2)
+
+        def add_page(page_number, page):
+            fig = pickle.loads(page)
+            fig.text(0.99, 0.01, str(page_number), ha='right', va='bottom', fontsize=10, color='dimgray')
+            with stage('save_combined'):
+                save_page(pdf, fig, pdf_mode)
+            plt.close(fig)
+
+        if processes <= 1:
+            for number, job in enumerate(jobs(), start=2):
+                add_page(number, _state_job(job))
+        else:
+            with process_pool(processes, initializer=use_agg) as pool:
+                pages = _bounded_map(pool, _state_job, jobs(), processes * STATE_WINDOW)
+                for number, page in enumerate(pages, start=2):
+                    add_page(number, page)
+    print(f"✅ {len(states)} state reports in {out_dir} and {combined} successfully created!")
+    return combined
+
+
+if __name__ == "__main__":
+    build_reports()
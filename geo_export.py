@@ -0,0 +1,152 @@
+import math
+import numpy as np
+import folium
+from shapely.geometry import mapping
+from instrument import traced
+
+# === Compact GeoJSON / TopoJSON export for the folium maps ===
+# merged.to_json() ships every column of the frame at full float precision. These helpers keep only
+# the properties a layer actually uses, round coordinates and numbers, and can build a TopoJSON
+# topology in which borders shared by neighbouring states are stored once.
+
+
+def _clean_value(value, digits):
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else round(float(value), digits)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def _feature_properties(gdf, properties, digits):
+    records = gdf[properties].to_dict('records')
+    return [{k: _clean_value(v, digits) for k, v in record.items()} for record in records]
+
+
+def _round_coords(coords, precision):
+    if isinstance(coords[0], (float, int)):
+        return [round(c, precision) for c in coords]
+    return [_round_coords(c, precision) for c in coords]
+
+
+@traced()
+def compact_geojson(gdf, properties, precision=4, digits=2):
+    """FeatureCollection with only `properties`, coordinates rounded to `precision` decimals."""
+    features = []
+    for geom, props in zip(gdf.geometry, _feature_properties(gdf, properties, digits)):
+        geometry = None
+        if geom is not None and not geom.is_empty:
+            geometry = mapping(geom)
+            geometry = {'type': geometry['type'], 'coordinates': _round_coords(geometry['coordinates'], precision)}
+        features.append({'type': 'Feature', 'properties': props, 'geometry': geometry})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# === TopoJSON ===
+
+def _polygons(geom):
+    if geom is None or geom.is_empty:
+        return []
+    if geom.geom_type == 'Polygon':
+        return [geom]
+    return list(geom.geoms)
+
+
+def _quantized_ring(ring, translate, scale):
+    pts = np.round((np.asarray(ring.coords)[:, :2] - translate) / scale).astype(np.int64)
+    keep = np.ones(len(pts), dtype=bool)
+    keep[1:] = np.any(pts[1:] != pts[:-1], axis=1)
+    pts = [tuple(p) for p in pts[keep]]
+    if pts[0] != pts[-1]:
+        pts.append(pts[0])
+    # A closed ring needs at least three distinct points
+    return pts if len(pts) >= 4 else None
+
+
+def _split_ring(ring, junctions):
+    points = ring[:-1]
+    cuts = [i for i, p in enumerate(points) if p in junctions]
+    if not cuts:
+        # Ring with no junctions: rotate to a canonical start so identical rings share one arc
+        start = points.index(min(points))
+        points = points[start:] + points[:start]
+        return [points + [points[0]]]
+    points = points[cuts[0]:] + points[:cuts[0]]
+    cuts = [c - cuts[0] for c in cuts] + [len(points)]
+    points = points + [points[0]]
+    return [points[a:b + 1] for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+@traced()
+def topojson(gdf, properties, object_name='states', quantization=1e5, digits=2):
+    """TopoJSON topology with shared arcs between adjacent polygons and delta-encoded integer coordinates."""
+    minx, miny, maxx, maxy = gdf.total_bounds
+    translate = np.array([minx, miny])
+    scale = np.array([(maxx - minx) / (quantization - 1) or 1.0, (maxy - miny) / (quantization - 1) or 1.0])
+
+    # Quantize every ring once: feature -> polygons -> rings
+    shapes = []
+    for geom in gdf.geometry:
+        polys = []
+        for poly in _polygons(geom):
+            exterior = _quantized_ring(poly.exterior, translate, scale)
+            if exterior is None:
+                continue
+            holes = [r for r in (_quantized_ring(i, translate, scale) for i in poly.interiors) if r is not None]
+            polys.append([exterior] + holes)
+        shapes.append(polys)
+
+    # Junctions are points with more than two distinct neighbours across all rings
+    neighbours = {}
+    for polys in shapes:
+        for rings in polys:
+            for ring in rings:
+                for a, b in zip(ring[:-1], ring[1:]):
+                    neighbours.setdefault(a, set()).add(b)
+                    neighbours.setdefault(b, set()).add(a)
+    junctions = {p for p, n in neighbours.items() if len(n) > 2}
+
+    arcs, arc_index = [], {}
+
+    def arc_id(points):
+        key = tuple(points)
+        if key in arc_index:
+            return arc_index[key]
+        reverse = tuple(reversed(points))
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[key] = len(arcs)
+        arcs.append(points)
+        return arc_index[key]
+
+    geometries = []
+    for polys, props in zip(shapes, _feature_properties(gdf, properties, digits)):
+        encoded = [[[arc_id(arc) for arc in _split_ring(ring, junctions)] for ring in rings] for rings in polys]
+        if not encoded:
+            geometries.append({'type': None, 'properties': props})
+        elif len(encoded) == 1:
+            geometries.append({'type': 'Polygon', 'arcs': encoded[0], 'properties': props})
+        else:
+            geometries.append({'type': 'MultiPolygon', 'arcs': encoded, 'properties': props})
+
+    delta_arcs = []
+    for points in arcs:
+        pts = np.asarray(points, dtype=np.int64)
+        pts[1:] = pts[1:] - pts[:-1]
+        delta_arcs.append(pts.tolist())
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': scale.tolist(), 'translate': translate.tolist()},
+        'objects': {object_name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': delta_arcs,
+    }
+
+
+def folium_layer(gdf, properties, geo_format='topojson', object_name='states', **kwargs):
+    """folium.TopoJson or folium.GeoJson layer built from the compact export of `properties`."""
+    if geo_format == 'topojson':
+        return folium.TopoJson(topojson(gdf, properties, object_name), f'objects.{object_name}', **kwargs)
+    return folium.GeoJson(compact_geojson(gdf, properties), **kwargs)
@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# === Stage-level timing and memory instrumentation ===
+# Scripts wrap their stages in `with stage('load'):` or decorate functions with `@traced()`. Nothing is
+# recorded unless tracing is enabled, either with enable() or by setting REPORT_TRACE to an output path:
+#   REPORT_TRACE=trace.json python test.py
+# Each stage records wall time, CPU time, peak RSS and, with REPORT_TRACEMALLOC=<n>, the n call sites
+# that allocated the most Python memory during it. At exit the run is written as a Chrome trace-event
+# file (open in chrome://tracing, Perfetto or speedscope for a flame graph) plus a .folded stack file
+# for flamegraph.pl.
+
+TRACE_ENV = 'REPORT_TRACE'
+TRACEMALLOC_ENV = 'REPORT_TRACEMALLOC'
+
+_state = {'enabled': False, 'top_allocations': 0, 'origin': time.perf_counter(), 'stack': [], 'records': []}
+
+
+def enable(top_allocations=0):
+    """Start recording stages; `top_allocations` > 0 also traces Python allocations (slower)."""
+    _state['enabled'] = True
+    _state['top_allocations'] = top_allocations
+    if top_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enabled():
+    return _state['enabled']
+
+
+def records():
+    return list(_state['records'])
+
+
+def _rss_mb():
+    # Current resident set size from /proc where available, else the process high-water mark
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb(who=None):
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return usage.ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def _fold_peak(frame):
+    # tracemalloc keeps one process-wide peak; nested stages fold it into their parent before resetting
+    frame['malloc_peak'] = max(frame['malloc_peak'], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def stage(name, **attrs):
+    if not _state['enabled']:
+        yield
+        return
+
+    stack = _state['stack']
+    tracing = _state['top_allocations'] and tracemalloc.is_tracing()
+    frame = {'name': name, 'malloc_peak': 0}
+    if tracing:
+        if stack:
+            _fold_peak(stack[-1])
+        else:
+            tracemalloc.reset_peak()
+        frame['snapshot'] = tracemalloc.take_snapshot()
+    stack.append(frame)
+    start, cpu, rss = time.perf_counter(), time.process_time(), _rss_mb()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        record = {
+            'name': name,
+            'path': [f['name'] for f in stack],
+            'start': start - _state['origin'],
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(time.process_time() - cpu, 6),
+            'rss_mb': round(_rss_mb(), 1),
+            'rss_delta_mb': round(_rss_mb() - rss, 1),
+            'peak_rss_mb': _peak_rss_mb(),
+            'children_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        }
+        record.update(attrs)
+        stack.pop()
+        if tracing:
+            _fold_peak(frame)
+            record['malloc_peak_mb'] = round(frame['malloc_peak'] / 2 ** 20, 2)
+            diff = tracemalloc.take_snapshot().compare_to(frame['snapshot'], 'lineno')
+            record['top_allocations'] = [{
+                'where': str(d.traceback[0]), 'size_kb': round(d.size_diff / 1024, 1), 'count': d.count_diff,
+            } for d in sorted(diff, key=lambda d: -d.size_diff)[:_state['top_allocations']]]
+            if stack:
+                stack[-1]['malloc_peak'] = max(stack[-1]['malloc_peak'], frame['malloc_peak'])
+        _state['records'].append(record)
+
+
+def traced(name=None):
+    """Decorator form of stage(); the stage is named after the function unless `name` is given."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# === Output ===
+
+def summary(records=None):
+    rows = records if records is not None else _state['records']
+    lines = []
+    for r in sorted(rows, key=lambda r: r['start']):
+        indent = '  ' * (len(r['path']) - 1)
+        lines.append(f"{indent}{r['name']:<{32 - len(indent)}} {r['wall_seconds']:9.3f} s wall "
+                     f"{r['cpu_seconds']:9.3f} s cpu  {r['rss_mb']:8.1f} MB rss")
+    return "\n".join(lines)
+
+
+def write_trace(path, records=None):
+    """Chrome trace-event JSON at `path` and folded stacks (self time in microseconds) next to it."""
+    rows = records if records is not None else _state['records']
+    events = [{
+        'name': r['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+        'ts': round(r['start'] * 1e6), 'dur': round(r['wall_seconds'] * 1e6),
+        'args': {k: v for k, v in r.items() if k not in ('name', 'path', 'start')},
+    } for r in rows]
+    trace = {
+        'traceEvents': events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'argv': sys.argv, 'python': sys.version.split()[0]},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(trace, f, indent=1, default=str)
+
+    # Self time = a stage's wall time minus that of its direct children
+    self_time = {}
+    for r in rows:
+        key = ';'.join(r['path'])
+        self_time[key] = self_time.get(key, 0) + r['wall_seconds']
+        if len(r['path']) > 1:
+            parent = ';'.join(r['path'][:-1])
+            self_time[parent] = self_time.get(parent, 0) - r['wall_seconds']
+    with open(os.path.splitext(path)[0] + '.folded', 'w') as f:
+        for key, seconds in self_time.items():
+            f.write(f"{key} {max(0, round(seconds * 1e6))}\n")
+
+
+def _write_at_exit(path):
+    if _state['records']:
+        write_trace(path)
+        print(f"⏱ Stage trace written to {path}", file=sys.stderr)
+        print(summary(), file=sys.stderr)
+
+
+if os.environ.get(TRACE_ENV):
+    enable(int(os.environ.get(TRACEMALLOC_ENV) or 0))
+    atexit.register(_write_at_exit, os.environ[TRACE_ENV])
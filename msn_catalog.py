@@ -0,0 +1,90 @@
+import os
+import numpy as np
+import pandas as pd
+
+# === SEDS MSN catalog ===
+# data/msn_catalog.csv describes every series code (MSN) in Energy_Production.csv: its energy source,
+# sector, unit and how to convert it to billion Btu (a fixed multiplier, optionally times a state/year
+# heat-content series such as CLPRK). `primary` marks the one series per source that measures its
+# production, so sources are never double counted across units. Adding a fuel to a map is a change to
+# that table (or to the list of sources a script asks for), not to the aggregation code.
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "msn_catalog.csv")
+BTU = 'billion Btu'
+
+_cache = {}
+
+
+def catalog(path=CATALOG_PATH):
+    """The catalog sorted by MSN."""
+    if path not in _cache:
+        df = pd.read_csv(path, dtype={'msn': str, 'factor_msn': str}, keep_default_na=False, na_values={'to_billion_btu': ['']})
+        df = df.sort_values('msn').reset_index(drop=True)
+        df['primary'] = df['primary'].astype(bool)
+        _cache[path] = df
+    return _cache[path]
+
+
+def encode(msns, path=CATALOG_PATH):
+    """Catalog row of each MSN, -1 where the code is not in the catalog."""
+    codes = catalog(path)['msn'].to_numpy(dtype=str)
+    msns = np.asarray(msns, dtype=str)
+    pos = np.searchsorted(codes, msns)
+    pos = np.minimum(pos, len(codes) - 1)
+    return np.where(codes[pos] == msns, pos, -1)
+
+
+def production_measures(sources, path=CATALOG_PATH):
+    """Primary production series of each source, in the order of `sources`."""
+    cat = catalog(path)
+    primary = cat[cat['primary']].set_index('source')
+    missing = [s for s in sources if s not in primary.index]
+    if missing:
+        raise KeyError(f"No primary production series for {missing}; sources with one: {sorted(primary.index)}")
+    return primary.loc[list(sources)].reset_index()
+
+
+def required_msns(msns, path=CATALOG_PATH):
+    """`msns` plus the heat-content series needed to convert them to billion Btu."""
+    cat = catalog(path)
+    rows = encode(msns, path)
+    factors = cat['factor_msn'].to_numpy(dtype=str)[rows[rows >= 0]]
+    return sorted(set(msns) | {f for f in factors if f})
+
+
+def to_billion_btu(values, msns, axis=1, path=CATALOG_PATH):
+    """Convert `values` (MSNs along `axis`) to billion Btu; series that cannot be converted become NaN.
+
+    Heat-content factors (e.g. CLPRK for CLPRP) are taken from the same array, so they must be among `msns`.
+    """
+    cat = catalog(path)
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, 0)
+    msns = np.asarray(msns, dtype=str)
+    rows = encode(msns, path)
+    known = rows >= 0
+
+    multiplier = np.full(len(msns), np.nan)
+    multiplier[known] = cat['to_billion_btu'].to_numpy(dtype=float)[rows[known]]
+    out = values * multiplier.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    factor_msn = np.full(len(msns), '', dtype=object)
+    factor_msn[known] = cat['factor_msn'].to_numpy(dtype=object)[rows[known]]
+    needs_factor = factor_msn != ''
+    if needs_factor.any():
+        lookup = {m: i for i, m in enumerate(msns)}
+        missing = sorted({f for f in factor_msn[needs_factor] if f not in lookup})
+        if missing:
+            raise KeyError(f"Heat-content series {missing} are needed to convert to {BTU}")
+        factor_idx = np.array([lookup[f] for f in factor_msn[needs_factor]])
+        out[needs_factor] = out[needs_factor] * values[factor_idx]
+    return np.moveaxis(out, 0, axis)
+
+
+def grouped_sum(values, codes, n_groups, axis=1):
+    """Sum `values` along `axis` into `n_groups` groups by integer code; codes < 0 are dropped, NaN counts as 0."""
+    values = np.moveaxis(np.nan_to_num(np.asarray(values, dtype=float)), axis, 0)
+    codes = np.asarray(codes)
+    keep = codes >= 0
+    out = np.zeros((n_groups,) + values.shape[1:])
+    np.add.at(out, codes[keep], values[keep])
+    return np.moveaxis(out, 0, axis)
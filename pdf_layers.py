@@ -0,0 +1,25 @@
+# === Hybrid raster/vector PDF pages ===
+# The density contours and the thousands of scatter markers are what make the report PDFs large and
+# slow to open when written as vector paths. In 'hybrid' mode the layers listed in `raster_layers` are
+# embedded as images at `dpi`, while axes, text, legends and fitted lines stay vector; 'vector' writes
+# every layer as paths, as before. Layer names are the ones the report scripts pass to pdf_layer().
+
+PDF_MODES = ('hybrid', 'vector')
+RASTER_DPI = 150
+RASTER_LAYERS = ('density', 'scatter')
+
+
+def pdf_layer(artist, layer, mode='hybrid', raster_layers=RASTER_LAYERS):
+    """Rasterize `artist` in the PDF if `mode` is 'hybrid' and `layer` is one of `raster_layers`."""
+    if mode not in PDF_MODES:
+        raise ValueError(f"Unknown PDF mode {mode!r}; expected one of {PDF_MODES}")
+    artist.set_rasterized(mode == 'hybrid' and layer in raster_layers)
+    return artist
+
+
+def save_page(pdf, fig, mode='hybrid', dpi=RASTER_DPI):
+    """pdf.savefig(fig), rendering rasterized layers at `dpi` in hybrid mode."""
+    if mode == 'hybrid':
+        pdf.savefig(fig, dpi=dpi)
+    else:
+        pdf.savefig(fig)
@@ -0,0 +1,280 @@
+import os
+import json
+import base64
+import hashlib
+import html
+from io import BytesIO
+import folium
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from msn_catalog import BTU
+from instrument import traced
+from workers import process_pool, use_agg
+
+# === Per-state popup charts for the energy maps ===
+# Charts are drawn on bare Agg figures (no pyplot state), so they can be rendered in worker processes,
+# and finished PNGs are kept in a content-addressed on-disk cache so unchanged states are not redrawn.
+
+CHART_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "charts")
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Bump when chart drawing code changes in a way the inputs do not capture
+CHART_STYLE_VERSION = 2
+
+ENERGY_COLORS = {
+    'Coal': '#636363',
+    'Natural Gas': '#3182bd',
+    'Nuclear': '#fd8d3c',
+    'Wind': '#31a354',
+    'Solar': '#ffd92f',
+}
+
+
+def _to_base64(fig, **savefig_kwargs):
+    FigureCanvasAgg(fig)
+    buf = BytesIO()
+    fig.savefig(buf, format='png', **savefig_kwargs)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def pie_chart(abbreviation, labels, sizes):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(sizes, labels=labels, colors=[ENERGY_COLORS[l] for l in labels], autopct='%1.1f%%', startangle=140)
+    ax.axis('equal')
+    ax.set_title(f"{abbreviation} Production Breakdown")
+    return _to_base64(fig, bbox_inches='tight')
+
+
+def bar_chart(abbreviation, labels, values, pct_values):
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    bars = ax.bar(labels, values, color=[ENERGY_COLORS[l] for l in labels])
+    for bar, pct in zip(bars, pct_values):
+        height = bar.get_height()
+        ax.annotate(f'{pct}%', xy=(bar.get_x() + bar.get_width() / 2, height),
+                    xytext=(0, 3), textcoords="offset points", ha='center', va='bottom', fontsize=8)
+    ax.set_title(f"{abbreviation} Energy Production ({BTU})")
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return _to_base64(fig)
+
+
+def cache_key(chart_fn, kwargs):
+    payload = {
+        'chart': chart_fn.__name__,
+        'kwargs': kwargs,
+        'style': [CHART_STYLE_VERSION, ENERGY_COLORS, matplotlib.__version__],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=float).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _cache_get(key, cache_dir):
+    path = os.path.join(cache_dir, f"{key}.png")
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(path)  # mtime doubles as the LRU timestamp
+    return base64.b64encode(data).decode('utf-8')
+
+
+def _cache_put(key, img_base64, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.png")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(base64.b64decode(img_base64))
+    os.replace(tmp_path, path)
+
+
+def evict_charts(cache_dir=CHART_CACHE_DIR, max_bytes=CHART_CACHE_MAX_BYTES):
+    # Drop least recently used PNGs until the cache fits in max_bytes
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.png'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def _render_job(job):
+    chart_fn, kwargs = job
+    return chart_fn(**kwargs)
+
+
+def _render_all(jobs, processes):
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    if processes <= 1:
+        return [_render_job(job) for job in jobs]
+
+    chunksize = max(1, len(jobs) // (processes * 4))
+    with process_pool(processes, initializer=use_agg) as pool:
+        return list(pool.map(_render_job, jobs, chunksize=chunksize))
+
+
+@traced()
+def render_charts(chart_fn, jobs, processes=None, cache_dir=CHART_CACHE_DIR, max_cache_bytes=CHART_CACHE_MAX_BYTES):
+    """Render chart_fn(**kwargs) for each kwargs dict in jobs; results come back in job order.
+
+    Charts whose inputs hash to a cached PNG are served from cache_dir (pass None to disable).
+    """
+    if cache_dir is None:
+        return _render_all([(chart_fn, kwargs) for kwargs in jobs], processes)
+
+    keys = [cache_key(chart_fn, kwargs) for kwargs in jobs]
+    images = [_cache_get(key, cache_dir) for key in keys]
+    misses = [i for i, img in enumerate(images) if img is None]
+    if misses:
+        rendered = _render_all([(chart_fn, jobs[i]) for i in misses], processes)
+        for i, img in zip(misses, rendered):
+            _cache_put(keys[i], img, cache_dir)
+            images[i] = img
+        evict_charts(cache_dir, max_cache_bytes)
+    return images
+
+
+# === Popup images as separate files ===
+# Inline base64 PNGs inside folium.IFrame get base64-encoded a second time and all of them are parsed
+# before the map is interactive. Instead the PNGs are written next to the map HTML and the popups only
+# carry a data-src that is swapped in when the popup opens.
+
+# Root-level scripts are emitted before the map itself, so the handler is bound once the page has parsed
+LAZY_POPUP_IMAGES_JS = """
+document.addEventListener('DOMContentLoaded', function () {
+    %s.on('popupopen', function (e) {
+        e.popup.getElement().querySelectorAll('img[data-src]').forEach(function (img) {
+            img.src = img.dataset.src;
+            img.removeAttribute('data-src');
+        });
+    });
+});
+"""
+
+
+def write_chart_files(images, names, out_dir, url_prefix):
+    """Write base64 PNGs as <name>-<hash>.png files in out_dir and return their URLs.
+
+    The content hash in the file name lets browsers cache the images indefinitely;
+    files from earlier builds that are no longer referenced are removed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    filenames = []
+    for img_base64, name in zip(images, names):
+        data = base64.b64decode(img_base64)
+        filename = f"{name}-{hashlib.sha256(data).hexdigest()[:10]}.png"
+        path = os.path.join(out_dir, filename)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        filenames.append(filename)
+
+    current = set(filenames)
+    for entry in os.scandir(out_dir):
+        if entry.name.endswith('.png') and entry.name not in current:
+            os.remove(entry.path)
+    return [f"{url_prefix}/{filename}" for filename in filenames]
+
+
+def lazy_img(url, width, height=None):
+    size = f' width="{width}"' + (f' height="{height}"' if height is not None else '')
+    return f'<img data-src="{url}"{size} alt="">'
+
+
+def enable_lazy_popup_images(m):
+    m.get_root().script.add_child(folium.Element(LAZY_POPUP_IMAGES_JS % m.get_name()))
+
+
+# === Popup charts drawn in the browser ===
+# The map only carries the per-state energy-mix numbers as one compact JSON object; a small inline
+# renderer draws the pie/bar chart as SVG into the popup when it opens. No PNGs are rendered at all.
+
+SVG_POPUP_CHARTS_JS = """
+var ENERGY_MIX = %(payload)s;
+
+function energyMixSvg(kind, state, title, width, height) {
+    var labels = ENERGY_MIX.labels, colors = ENERGY_MIX.colors;
+    var values = (ENERGY_MIX.data[state] || labels.map(function () { return 0; })).map(function (v) { return v || 0; });
+    var total = values.reduce(function (a, b) { return a + b; }, 0);
+    var pct = function (v) { return total > 0 ? Math.round(v / total * 1000) / 10 : 0; };
+    var out = ['<svg xmlns="http://www.w3.org/2000/svg" width="' + width + '" height="' + height +
+               '" font-family="sans-serif" font-size="10">',
+               '<text x="' + width / 2 + '" y="14" text-anchor="middle" font-size="12">' + title + '</text>'];
+
+    if (kind === 'pie') {
+        var cx = width / 2, cy = (height + 20) / 2, r = Math.min(width, height - 20) / 2 - 28;
+        var angle = 140 * Math.PI / 180;  // same start angle as the matplotlib pies
+        values.forEach(function (v, i) {
+            if (!(v > 0)) { return; }
+            var sweep = 2 * Math.PI * v / total, mid = angle + sweep / 2, end = angle + sweep;
+            if (sweep >= 2 * Math.PI - 1e-9) {
+                out.push('<circle cx="' + cx + '" cy="' + cy + '" r="' + r + '" fill="' + colors[i] + '"/>');
+            } else {
+                out.push('<path fill="' + colors[i] + '" d="M' + cx + ',' + cy +
+                         'L' + (cx + r * Math.cos(angle)) + ',' + (cy - r * Math.sin(angle)) +
+                         'A' + r + ',' + r + ' 0 ' + (sweep > Math.PI ? 1 : 0) + ' 0 ' +
+                         (cx + r * Math.cos(end)) + ',' + (cy - r * Math.sin(end)) + 'Z"/>');
+            }
+            out.push('<text x="' + (cx + 0.6 * r * Math.cos(mid)) + '" y="' + (cy - 0.6 * r * Math.sin(mid)) +
+                     '" text-anchor="middle" dominant-baseline="middle">' + pct(v).toFixed(1) + '%%</text>');
+            out.push('<text x="' + (cx + 1.1 * r * Math.cos(mid)) + '" y="' + (cy - 1.1 * r * Math.sin(mid)) +
+                     '" text-anchor="' + (Math.cos(mid) < 0 ? 'end' : 'start') + '" dominant-baseline="middle">' +
+                     labels[i] + '</text>');
+            angle = end;
+        });
+    } else {
+        var left = 10, right = width - 10, top = 30, bottom = height - 50;
+        var max = Math.max.apply(null, values.concat([1e-9]));
+        var slot = (right - left) / values.length;
+        out.push('<line x1="' + left + '" y1="' + bottom + '" x2="' + right + '" y2="' + bottom + '" stroke="#333"/>');
+        values.forEach(function (v, i) {
+            var h = (bottom - top) * v / max, x = left + i * slot + slot * 0.1, xc = left + (i + 0.5) * slot;
+            out.push('<rect x="' + x + '" y="' + (bottom - h) + '" width="' + slot * 0.8 + '" height="' + h +
+                     '" fill="' + colors[i] + '"/>');
+            out.push('<text x="' + xc + '" y="' + (bottom - h - 3) + '" text-anchor="middle" font-size="8">' +
+                     pct(v) + '%%</text>');
+            out.push('<text x="' + xc + '" y="' + (bottom + 10) + '" text-anchor="end" transform="rotate(-45 ' +
+                     xc + ' ' + (bottom + 10) + ')">' + labels[i] + '</text>');
+        });
+    }
+    out.push('</svg>');
+    return out.join('');
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    %(map)s.on('popupopen', function (e) {
+        e.popup.getElement().querySelectorAll('[data-energy-chart]').forEach(function (el) {
+            if (el.firstChild) { return; }
+            el.innerHTML = energyMixSvg(el.dataset.energyChart, el.dataset.state, el.dataset.title,
+                                        +el.dataset.width, +el.dataset.height);
+        });
+    });
+});
+"""
+
+
+def energy_mix_payload(frame, labels, key='abbreviation'):
+    data = {}
+    for state, values in zip(frame[key], frame[labels].to_numpy(dtype=float)):
+        data[str(state)] = [None if np.isnan(v) else round(float(v), 1) for v in values]
+    return {'labels': labels, 'colors': [ENERGY_COLORS[l] for l in labels], 'data': data}
+
+
+def svg_chart_placeholder(kind, state, title, width, height):
+    return (f'<div data-energy-chart="{kind}" data-state="{html.escape(str(state))}" '
+            f'data-title="{html.escape(title)}" data-width="{width}" data-height="{height}"></div>')
+
+
+def enable_svg_popup_charts(m, payload):
+    js = SVG_POPUP_CHARTS_JS % {'payload': json.dumps(payload, separators=(',', ':')), 'map': m.get_name()}
+    m.get_root().script.add_child(folium.Element(js))
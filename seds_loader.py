@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import mmap
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+from disk_cache import file_hash, publish_dir
+from instrument import traced
+
+# === Shared loader for the EIA SEDS wide tables (Energy_Production.csv, totalconsumption.csv, ...) ===
+# The first read of a file parses it once and writes a columnar .npy cache keyed by the file's
+# content hash; later reads memory-map that cache and only touch the requested years and rows.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "seds")
+
+# Thousands separators are only accepted between groups of three digits ("59,303", "1,234,567.5");
+# a cell such as " 1,2,3 " is malformed rather than 123
+THOUSANDS = r'\s*[-+]?\d{1,3}(?:,\d{3})+(?:\.\d*)?\s*'
+_QUOTED_FIELD = re.compile(rb'"((?:[^"]|"")*)"')
+_COMMA_NUMBER = re.compile(rb'\s*[-+]?[\d.,]*,[\d.,]*\s*')
+_THOUSANDS = re.compile(THOUSANDS.encode())
+
+
+def _year_columns(columns):
+    return [c for c in columns if str(c).strip().isdigit()]
+
+
+def _header(path):
+    return [str(c).strip() for c in pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns]
+
+
+def _misplaced_separators(path):
+    """Whether any quoted number in the file has commas outside the groups-of-three pattern.
+
+    The CSV engine's `thousands` option drops every comma, so these cells only show up in the raw text.
+    """
+    if os.path.getsize(path) == 0:
+        return False
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data.find(b'"') < 0:
+            return False
+        for match in _QUOTED_FIELD.finditer(data):
+            cell = match.group(1)
+            if b',' in cell and _COMMA_NUMBER.fullmatch(cell) and not _THOUSANDS.fullmatch(cell):
+                return True
+    return False
+
+
+def _strip_thousands(s):
+    # Commas are removed only from well-formed groups; anything else stays and fails to parse
+    grouped = s.str.fullmatch(THOUSANDS, na=False)
+    return s.str.strip().mask(grouped, s.str.replace(',', '', regex=False).str.strip())
+
+
+def _bad_cells(raw, year_columns, key_columns, first_row=0):
+    # Every year cell of a text-read frame that is not a number; `first_row` is the frame's offset in the file
+    text = raw[year_columns].apply(_strip_thousands)
+    parsed = text.apply(pd.to_numeric, errors='coerce')
+    bad = parsed.isna() & text.notna() & (text != '')
+    rows, cols = np.nonzero(bad.to_numpy())
+    cells = pd.DataFrame({
+        'line': rows + first_row + 2,  # 1-based, after the header
+        'key': raw[key_columns].iloc[rows].apply(lambda r: '/'.join(r.str.strip()), axis=1).to_numpy() if len(rows) else [],
+        'column': np.asarray(year_columns)[cols],
+        'value': raw[year_columns].to_numpy()[rows, cols],
+    })
+    return cells, parsed
+
+
+def _malformed_cells(path, columns, year_columns, key_columns):
+    # Slow path, only taken after the fast parse failed: re-read the year columns as text to find every bad cell
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig', names=columns, header=0)
+    cells, parsed = _bad_cells(raw, year_columns, key_columns)
+    return cells, raw, parsed
+
+
+def _malformed_message(path, cells, limit=20):
+    report = cells.head(limit).to_string(index=False)
+    return f"{path}: {len(cells)} malformed numeric cells (first {min(len(cells), limit)}):\n{report}"
+
+
+def read_numeric_table(path, dtype='float64', errors='raise'):
+    """Parse a wide SEDS-style CSV (key columns + one column per year) straight to a float array.
+
+    Values may be quoted, space padded and thousands separated (" 59,303 "); the CSV engine parses them
+    without an intermediate string per cell. Separators must split groups of three digits (see THOUSANDS).
+    If any cell is not a number, all of them are reported at once: errors='raise' raises ValueError
+    listing them, errors='coerce' warns and reads them as NaN.
+    Returns (keys frame, year labels, values) with values shaped (rows, years).
+    """
+    columns = _header(path)
+    years = _year_columns(columns)
+    key_columns = [c for c in columns if c not in years]
+    try:
+        df = pd.read_csv(path, dtype={**{c: str for c in key_columns}, **{y: dtype for y in years}},
+                         thousands=',', encoding='utf-8-sig', names=columns, header=0)
+        values = df[years].to_numpy(dtype=dtype)
+        if _misplaced_separators(path):
+            raise ValueError(f"{path} has misplaced thousands separators")
+    except ValueError:
+        cells, df, parsed = _malformed_cells(path, columns, years, key_columns)
+        if cells.empty:
+            raise
+        message = _malformed_message(path, cells)
+        if errors != 'coerce':
+            raise ValueError(message) from None
+        warnings.warn(message + "\nThey are read as NaN.")
+        values = parsed.to_numpy(dtype=dtype)
+    return df[key_columns], years, values
+
+
+@traced()
+def _parse_csv(path, dtype='float64'):
+    keys, years, values = read_numeric_table(path, dtype)
+    state = keys['State'].str.strip().str.upper().to_numpy(dtype=str)
+    # Single-series tables such as totalconsumption.csv have no MSN column
+    msn = keys['MSN'].str.strip().str.upper().to_numpy(dtype=str) if 'MSN' in keys else np.full(len(keys), '')
+    return {
+        'state': state,
+        'msn': msn,
+        'years': np.array([int(y) for y in years], dtype='int16'),
+        # Column-major so each year is one contiguous block in the memory-mapped file
+        'values': np.asfortranarray(values),
+    }
+
+
+def _write_cache(arrays, cache_path):
+    with publish_dir(cache_path) as tmp_dir:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arr, allow_pickle=False)
+
+
+def _read_cache(cache_path):
+    return {
+        'state': np.load(os.path.join(cache_path, "state.npy")),
+        'msn': np.load(os.path.join(cache_path, "msn.npy")),
+        'years': np.load(os.path.join(cache_path, "years.npy")),
+        'values': np.load(os.path.join(cache_path, "values.npy"), mmap_mode='r'),
+    }
+
+
+@traced()
+def load_arrays(path, cache_dir=CACHE_DIR, dtype='float64'):
+    suffix = '' if np.dtype(dtype) == np.float64 else f"-{np.dtype(dtype).name}"
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}-{file_hash(path)[:16]}{suffix}")
+    if not os.path.isdir(cache_path):
+        _write_cache(_parse_csv(path, dtype), cache_path)
+    return _read_cache(cache_path)
+
+
+# === Streaming reads with filter pushdown ===
+# The full SEDS release is far larger than the bundled slices. Files at least STREAM_MIN_BYTES are not
+# parsed whole: they are read in chunks, only the requested year columns are parsed, rows are filtered
+# by MSN/state (and year, for the long layout) per chunk, and only the matching rows are kept, so peak
+# memory is one chunk plus the result. The filtered result is cached like a whole-file read.
+
+STREAM_MIN_BYTES = 256 * 1024 * 1024
+STREAM_CHUNK_ROWS = 100_000
+
+
+def _as_codes(values):
+    return None if values is None else np.asarray([str(v).strip().upper() for v in values], dtype=str)
+
+
+def _scan_chunks(path, columns, usecols, value_columns, dtypes, chunksize):
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtypes, thousands=',', encoding='utf-8-sig',
+                         names=columns, header=0, chunksize=chunksize)
+    first_row = 0
+    try:
+        for chunk in reader:
+            yield chunk
+            first_row += len(chunk)
+    except ValueError as exc:
+        error = exc
+    else:
+        if not _misplaced_separators(path):
+            return
+        error, first_row = None, 0
+
+    # A chunk failed to parse (or a number has misplaced separators): re-read from that chunk on as text,
+    # chunk by chunk, so the report lists the malformed cells of every chunk, not only the first failing one
+    key_columns = [c for c in usecols if c not in value_columns]
+    text_reader = pd.read_csv(path, usecols=usecols, dtype=str, encoding='utf-8-sig', names=columns, header=0,
+                              skiprows=range(1, first_row + 1), chunksize=chunksize)
+    found = []
+    for raw in text_reader:
+        found.append(_bad_cells(raw, value_columns, key_columns, first_row)[0])
+        first_row += len(raw)
+    cells = pd.concat(found, ignore_index=True) if found else pd.DataFrame()
+    if cells.empty:
+        if error is None:
+            return
+        raise error
+    raise ValueError(_malformed_message(path, cells)) from None
+
+
+def _scan_wide(path, columns, msn, states, years, chunksize, dtype):
+    all_years = _year_columns(columns)
+    wanted = all_years if years is None else [y for y in all_years if int(y) in set(int(v) for v in years)]
+    keys = [c for c in ['State', 'MSN'] if c in columns]
+    dtypes = {**{c: str for c in keys}, **{y: dtype for y in wanted}}
+
+    parts = {'state': [], 'msn': [], 'values': []}
+    for chunk in _scan_chunks(path, columns, keys + wanted, wanted, dtypes, chunksize):
+        state = chunk['State'].str.strip().str.upper().to_numpy(dtype=str)
+        code = chunk['MSN'].str.strip().str.upper().to_numpy(dtype=str) if 'MSN' in chunk else np.full(len(chunk), '')
+        mask = np.ones(len(chunk), dtype=bool)
+        if msn is not None:
+            mask &= np.isin(code, msn)
+        if states is not None:
+            mask &= np.isin(state, states)
+        parts['state'].append(state[mask])
+        parts['msn'].append(code[mask])
+        parts['values'].append(chunk[wanted].to_numpy(dtype=dtype)[mask])
+    return {
+        'state': np.concatenate(parts['state']) if parts['state'] else np.array([], dtype=str),
+        'msn': np.concatenate(parts['msn']) if parts['msn'] else np.array([], dtype=str),
+        'years': np.array([int(y) for y in wanted], dtype='int16'),
+        'values': np.asfortranarray(np.concatenate(parts['values']) if parts['values'] else np.empty((0, len(wanted)), dtype)),
+    }
+
+
+def _scan_long(path, columns, msn, states, years, chunksize, dtype):
+    # Complete SEDS layout: one row per (MSN, state, year) observation
+    state_col = 'StateCode' if 'StateCode' in columns else 'State'
+    dtypes = {'MSN': str, state_col: str, 'Year': 'int32', 'Data': dtype}
+    years = None if years is None else np.asarray([int(y) for y in years])
+
+    parts = {'state': [], 'msn': [], 'year': [], 'value': []}
+    for chunk in _scan_chunks(path, columns, ['MSN', state_col, 'Year', 'Data'], ['Data'], dtypes, chunksize):
+        state = chunk[state_col].str.strip().str.upper().to_numpy(dtype=str)
+        code = chunk['MSN'].str.strip().str.upper().to_numpy(dtype=str)
+        year = chunk['Year'].to_numpy()
+        mask = np.ones(len(chunk), dtype=bool)
+        if msn is not None:
+            mask &= np.isin(code, msn)
+        if states is not None:
+            mask &= np.isin(state, states)
+        if years is not None:
+            mask &= np.isin(year, years)
+        parts['state'].append(state[mask])
+        parts['msn'].append(code[mask])
+        parts['year'].append(year[mask])
+        parts['value'].append(chunk['Data'].to_numpy(dtype=dtype)[mask])
+
+    if not sum(len(s) for s in parts['state']):
+        # Nothing matched the filters: empty arrays, as _scan_wide returns
+        return {'state': np.array([], dtype=str), 'msn': np.array([], dtype=str),
+                'years': np.array([], dtype='int16'), 'values': np.empty((0, 0), dtype=dtype, order='F')}
+    state, code = np.concatenate(parts['state']), np.concatenate(parts['msn'])
+    year, value = np.concatenate(parts['year']), np.concatenate(parts['value'])
+    # Pivot the retained observations to one row per (state, MSN) series
+    pairs, row = np.unique(np.char.add(np.char.add(state, '\t'), code), return_inverse=True)
+    out_years, col = np.unique(year, return_inverse=True)
+    values = np.full((len(pairs), len(out_years)), np.nan, dtype=dtype, order='F')
+    values[row, col] = value
+    split = np.char.partition(pairs, '\t')
+    return {'state': split[:, 0], 'msn': split[:, 2], 'years': out_years.astype('int16'), 'values': values}
+
+
+@traced()
+def scan_seds(path, msn=None, states=None, years=None, chunksize=STREAM_CHUNK_ROWS, dtype='float64'):
+    """Stream a SEDS CSV (wide, or the long MSN/StateCode/Year/Data layout) keeping only matching rows and years."""
+    columns = _header(path)
+    scan = _scan_long if {'MSN', 'Year', 'Data'} <= set(columns) else _scan_wide
+    return scan(path, columns, _as_codes(msn), _as_codes(states), years, chunksize, dtype)
+
+
+def _select(arrays, msn=None, states=None, years=None):
+    rows = np.ones(len(arrays['msn']), dtype=bool)
+    if msn is not None:
+        rows &= np.isin(arrays['msn'], _as_codes(msn))
+    if states is not None:
+        rows &= np.isin(arrays['state'], _as_codes(states))
+    rows = np.flatnonzero(rows)
+    cols = np.arange(len(arrays['years']))
+    if years is not None:
+        cols = np.flatnonzero(np.isin(arrays['years'], np.asarray([int(y) for y in years])))
+    return {
+        'state': arrays['state'][rows], 'msn': arrays['msn'][rows], 'years': arrays['years'][cols],
+        'values': np.asarray(arrays['values'][:, cols])[rows],
+    }
+
+
+def select_arrays(path, msn=None, states=None, years=None, cache_dir=CACHE_DIR, dtype='float64'):
+    """Rows of `msn`/`states` and columns of `years` (None = all) of a SEDS CSV as arrays.
+
+    Small files are cached whole and filtered from the memory-mapped cache; files of STREAM_MIN_BYTES or
+    more are streamed with the filters applied while reading, and that filtered result is cached.
+    """
+    if os.path.getsize(path) < STREAM_MIN_BYTES:
+        return _select(load_arrays(path, cache_dir, dtype), msn, states, years)
+    predicates = [None if v is None else sorted(str(x).strip().upper() for x in v) for v in (msn, states, years)]
+    key = hashlib.sha256(json.dumps([predicates, np.dtype(dtype).name]).encode()).hexdigest()[:12]
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}-{file_hash(path)[:16]}-{key}")
+    if not os.path.isdir(cache_path):
+        _write_cache(scan_seds(path, msn, states, years, dtype=dtype), cache_path)
+    return _read_cache(cache_path)
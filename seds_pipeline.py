@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from seds_loader import CACHE_DIR, select_arrays
+import energy_metrics
+import msn_catalog
+from instrument import traced
+
+# === Multi-year SEDS pipeline ===
+# Turns the wide State x MSN rows (one column per year) into dense (state, MSN, year) arrays and
+# computes the per-state production/consumption metrics for every year in one pass.
+
+AGGREGATE_STATES = ['US', 'TOTAL US']
+# Total energy consumption (billion Btu) in a multi-series table; single-series tables such as
+# totalconsumption.csv are that series already
+TOTAL_CONSUMPTION_MSN = 'TETCB'
+
+
+def seds_cube(path, msn=None, years=None, cache_dir=CACHE_DIR, states=None):
+    arrays = select_arrays(path, msn, states, years, cache_dir)
+    states, state_pos = np.unique(arrays['state'], return_inverse=True)
+    msns, msn_pos = np.unique(arrays['msn'], return_inverse=True)
+    # Rows repeating a (state, MSN) pair are summed, like a groupby sum; a year missing from every row stays NaN
+    values = np.asarray(arrays['values'])
+    shape = (len(states), len(msns), len(arrays['years']))
+    total, count = np.zeros(shape), np.zeros(shape)
+    np.add.at(total, (state_pos, msn_pos), np.nan_to_num(values))
+    np.add.at(count, (state_pos, msn_pos), ~np.isnan(values))
+    cube = np.where(count > 0, total, np.nan)
+    return {'states': states, 'msns': msns, 'years': arrays['years'].astype(int), 'values': cube}
+
+
+def _is_state(abbreviations):
+    upper = np.char.upper(abbreviations.astype(str))
+    return (np.char.find(upper, 'TOTAL') < 0) & ~np.isin(upper, AGGREGATE_STATES)
+
+
+@traced()
+def energy_cube(production_path, consumption_path, types, years=None, cache_dir=CACHE_DIR):
+    """Consumption and per-source production (billion Btu, from the MSN catalog) for every state and year.
+
+    `consumption_path` is a total energy consumption table: single-series (totalconsumption.csv) or one
+    with a TOTAL_CONSUMPTION_MSN row per state. Other indicators (GDP, population, prices) are never summed.
+    """
+    measures = msn_catalog.production_measures(types)
+    cons = seds_cube(consumption_path, years=years, cache_dir=cache_dir)
+    prod = seds_cube(production_path, msn=msn_catalog.required_msns(list(measures['msn'])), years=years,
+                     cache_dir=cache_dir)
+    years = np.intersect1d(cons['years'], prod['years'])
+
+    # Consumption: the state's total energy consumption series
+    series = np.flatnonzero(np.isin(cons['msns'], ['', TOTAL_CONSUMPTION_MSN]))
+    if len(series) != 1:
+        raise KeyError(f"{consumption_path} has no total energy consumption series; expected a single-series "
+                       f"table such as totalconsumption.csv or {TOTAL_CONSUMPTION_MSN} rows (billion Btu)")
+    keep = _is_state(cons['states'])
+    states = cons['states'][keep]
+    consumption = cons['values'][keep][:, series[0], :][:, np.isin(cons['years'], years)]
+
+    # Production by energy type: each source's primary series in billion Btu, summed by integer type code
+    types = np.asarray(types, dtype=str)
+    type_code = dict(zip(measures['msn'], range(len(types))))
+    codes = np.array([type_code.get(m, -1) for m in prod['msns']])
+    prod_values = msn_catalog.to_billion_btu(prod['values'][:, :, np.isin(prod['years'], years)], prod['msns'])
+    by_type = msn_catalog.grouped_sum(prod_values, codes, len(types), axis=1)
+
+    # Align production rows to the consumption states; states with no production rows stay NaN
+    production = np.full((len(states), len(types), len(years)), np.nan)
+    pos = np.searchsorted(prod['states'], states)
+    found = (pos < len(prod['states'])) & (prod['states'][np.minimum(pos, len(prod['states']) - 1)] == states)
+    production[found] = by_type[pos[found]]
+    total_production = energy_metrics.total_production(production, axis=1)
+    ratio = energy_metrics.prod_cons_ratio(total_production, consumption)
+
+    return {
+        'states': states, 'years': years, 'types': types,
+        'consumption': consumption, 'production': production, 'total_production': total_production,
+        'vulnerability_score': energy_metrics.vulnerability_score(total_production, consumption),
+        'prod_cons_ratio': ratio,
+        'category': energy_metrics.category(ratio),
+        'status': energy_metrics.status(total_production, consumption),
+        'shares': energy_metrics.energy_shares(production, total_production, axis=1),
+    }
+
+
+def state_energy_by_year(production_path, consumption_path, types, years=None, cache_dir=CACHE_DIR):
+    """Long (abbreviation, year) frame with the state_data columns of the map scripts."""
+    cube = energy_cube(production_path, consumption_path, types, years, cache_dir)
+    n_states, n_years = len(cube['states']), len(cube['years'])
+
+    df = pd.DataFrame({
+        'abbreviation': np.repeat(cube['states'], n_years),
+        'year': np.tile(cube['years'], n_states),
+        'consumption': cube['consumption'].ravel(),
+    })
+    for i, e_type in enumerate(cube['types']):
+        df[e_type] = cube['production'][:, i, :].ravel()
+    for col in ['total_production', 'vulnerability_score', 'prod_cons_ratio', 'category']:
+        df[col] = cube[col].ravel()
+    return df
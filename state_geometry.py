@@ -0,0 +1,79 @@
+import os
+import sys
+import shapely
+import geopandas as gpd
+
+# === Offline US state geometry store ===
+# The map scripts used to download us-states.json from GitHub on every run and compute centroids in
+# lon/lat degrees. The store below is built once from that file and committed under data/geometry/:
+# one GeoParquet file per detail level, each carrying projected centroids and label points.
+
+SOURCE_URL = "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json"
+GEOMETRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "geometry")
+
+# Simplification tolerance in degrees per detail level (None keeps the source geometry). The states are
+# simplified together as one coverage (shapely.coverage_simplify), so a border shared by two states is
+# simplified once and neighbors neither overlap nor leave gaps; the tolerances keep the vertex counts
+# of the earlier per-state simplification at 0.05 and 0.15 degrees.
+DETAIL_LEVELS = {
+    'full': None,
+    'medium': 0.1,
+    'low': 0.3,
+}
+
+# Equal-area projection for the lower 48 (Alaska/Hawaii centroids are still well inside their shapes)
+PROJECTED_CRS = "EPSG:5070"
+
+
+def store_path(level):
+    return os.path.join(GEOMETRY_DIR, f"us_states_{level}.parquet")
+
+
+def _with_label_points(states):
+    projected = states.to_crs(PROJECTED_CRS)
+    centroids = projected.geometry.centroid.to_crs(states.crs)
+    labels = projected.geometry.representative_point().to_crs(states.crs)
+    states = states.copy()
+    states['longitude'] = centroids.x
+    states['latitude'] = centroids.y
+    states['label_longitude'] = labels.x
+    states['label_latitude'] = labels.y
+    return states
+
+
+def simplify_coverage(gdf, tolerance):
+    """Copy of `gdf` with its non-overlapping polygons simplified together, keeping shared edges shared."""
+    out = gdf.copy()
+    out['geometry'] = gpd.GeoSeries(shapely.coverage_simplify(gdf.geometry.values, tolerance),
+                                    index=gdf.index, crs=gdf.crs)
+    return out
+
+
+def build_store(source=SOURCE_URL):
+    """Write every detail level from the source GeoJSON (or from the bundled full level, a .parquet path)."""
+    if str(source).endswith('.parquet'):
+        states = gpd.read_parquet(source)
+    else:
+        states = gpd.read_file(source)[['id', 'name', 'density', 'geometry']]
+        if states.crs is None:
+            states = states.set_crs("EPSG:4326")
+        states = _with_label_points(states)
+
+    os.makedirs(GEOMETRY_DIR, exist_ok=True)
+    for level, tolerance in DETAIL_LEVELS.items():
+        out = states.copy() if tolerance is None else simplify_coverage(states, tolerance)
+        out.to_parquet(store_path(level), index=False)
+        print(f"✅ {level}: {os.path.getsize(store_path(level)):,} bytes -> {store_path(level)}")
+
+
+def load_states(level='medium'):
+    if level not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown detail level {level!r}; expected one of {list(DETAIL_LEVELS)}")
+    path = store_path(level)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; run `python state_geometry.py` to build the geometry store")
+    return gpd.read_parquet(path)
+
+
+if __name__ == "__main__":
+    build_store(sys.argv[1] if len(sys.argv) > 1 else SOURCE_URL)
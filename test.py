@@ -1,61 +1,39 @@
 import os
-import pandas as pd
-import geopandas as gpd
 import folium
 from folium.features import DivIcon, GeoJsonTooltip
-import matplotlib.pyplot as plt
-from matplotlib.colors import Normalize
-import base64
-from io import BytesIO
-
-# === Load US States GeoJSON ===
-us_states = gpd.read_file("https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json")
-
-# === Load Consumption Data ===
-consumption_df = pd.read_csv("energy_indicators.csv")
-consumption_df['abbreviation'] = consumption_df['State'].str.strip().str.upper()
-consumption_df = consumption_df[~consumption_df['abbreviation'].str.contains('TOTAL', case=False, na=False)]
-consumption_df = consumption_df[~consumption_df['abbreviation'].isin(['US', 'TOTAL US'])]
-consumption_df['2022'] = consumption_df['2022'].astype(str).str.replace(',', '', regex=False).astype(float)
-consumption_2022 = consumption_df.groupby('abbreviation').agg({'2022': 'sum'}).reset_index().rename(columns={'2022': 'consumption'})
-
-# === Load Energy Production Data ===
-energy_df = pd.read_csv("Energy_Production.csv")
-energy_df = energy_df[['State', 'MSN', '2022']]
-msn_to_type = {
-    'CLPRB': 'Coal', 'CLPRK': 'Coal', 'CLPRP': 'Coal',
-    'NGMPB': 'Natural Gas', 'NGMPK': 'Natural Gas', 'NGMPP': 'Natural Gas',
-    'NUEGP': 'Nuclear', 'NUETB': 'Nuclear',
-    'WYTCB': 'Wind',
-    'SOTCB': 'Solar', 'SOPTCB': 'Solar'
-}
-energy_df['Energy_Type'] = energy_df['MSN'].map(msn_to_type)
-energy_df = energy_df[energy_df['Energy_Type'].notna()]
-energy_df['abbreviation'] = energy_df['State'].str.strip().str.upper()
-energy_df['2022'] = energy_df['2022'].astype(str).str.replace(',', '', regex=False).astype(float)
-
-# === Aggregate ===
-energy_breakdown = energy_df.groupby(['abbreviation', 'Energy_Type']).agg({'2022': 'sum'}).reset_index()
-energy_pivot = energy_breakdown.pivot(index='abbreviation', columns='Energy_Type', values='2022').reset_index().fillna(0)
-energy_pivot['total_production'] = energy_pivot[['Coal', 'Natural Gas', 'Nuclear', 'Wind', 'Solar']].sum(axis=1)
-
-# === Merge with consumption ===
-state_data = pd.merge(consumption_2022, energy_pivot, on='abbreviation', how='left')
-state_data['vulnerability_score'] = round(
-    (state_data['consumption'] - state_data['total_production']) / state_data['consumption'], 2)
-state_data['vulnerability_score'] = state_data['vulnerability_score'].clip(lower=0).fillna(0)
-state_data['prod_cons_ratio'] = state_data['total_production'] / state_data['consumption']
-
-# Category
-state_data['category'] = state_data['prod_cons_ratio'].apply(lambda r: 'High Producer' if r >= 1.2 else ('Medium' if r >= 0.8 else 'Low Producer'))
-state_data['status'] = state_data.apply(
-    lambda row: 'Exporter' if row['total_production'] > row['consumption']
-    else ('Balanced' if abs(row['total_production'] - row['consumption']) < 0.05 * row['consumption']
-    else 'Importer'), axis=1)
-
-# Percentage Shares
-for e_type in ['Coal', 'Natural Gas', 'Nuclear', 'Wind', 'Solar']:
-    state_data[f'{e_type}_pct'] = round((state_data[e_type] / state_data['total_production']) * 100, 1).fillna(0)
+from seds_pipeline import state_energy_by_year
+from build import cached_frame
+from energy_metrics import add_energy_metrics
+from msn_catalog import BTU
+from state_geometry import load_states
+from geo_export import folium_layer
+from instrument import stage
+from popup_charts import (
+    render_charts, bar_chart, write_chart_files, lazy_img, enable_lazy_popup_images,
+    energy_mix_payload, svg_chart_placeholder, enable_svg_popup_charts
+)
+
+# === Load US States geometry (bundled, with precomputed centroids) ===
+with stage('load_geometry'):
+    us_states = load_states('medium')
+
+# === Production vs. Consumption for every SEDS year (1960-2022) ===
+YEAR = 2022
+
+# Energy sources to map; their production series and units come from data/msn_catalog.csv
+energy_types = ['Coal', 'Natural Gas', 'Nuclear', 'Wind', 'Solar']
+with stage('aggregate'):
+    # Cached between builds until the SEDS files, the MSN catalog or the pipeline code change
+    state_data_by_year = cached_frame(
+        'state_energy', state_energy_by_year,
+        inputs=["Energy_Production.csv", "totalconsumption.csv", "data/msn_catalog.csv"],
+        production_path="Energy_Production.csv", consumption_path="totalconsumption.csv", types=energy_types,
+    )
+    state_data = state_data_by_year[state_data_by_year['year'] == YEAR].drop(columns='year').reset_index(drop=True)
+
+# Status, vulnerability and percentage shares
+with stage('metrics'):
+    state_data = add_energy_metrics(state_data, energy_types)
 
 # Abbreviation Map
 abbreviation_map = {name: abbr for abbr, name in {
@@ -73,11 +51,8 @@ abbreviation_map = {name: abbr for abbr, name in {
 us_states['abbreviation'] = us_states['name'].map(abbreviation_map)
 
 # === Merge ===
-merged = us_states.merge(state_data, on='abbreviation', how='left')
-merged['centroid'] = merged.geometry.centroid
-merged['longitude'] = merged['centroid'].x
-merged['latitude'] = merged['centroid'].y
-merged = merged.drop(columns=['centroid'])
+with stage('merge'):
+    merged = us_states.merge(state_data, on='abbreviation', how='left')
 
 # === Map ===
 m = folium.Map(location=[37.8, -96], zoom_start=4)
@@ -112,47 +87,56 @@ style_function = lambda feature: {
 }
 
 # Bar chart with % labels
-def create_bar_chart(row):
-    labels = ['Coal', 'Natural Gas', 'Nuclear', 'Wind', 'Solar']
-    values = [row.get(e, 0) for e in labels]
-    pct_values = [row.get(f'{e}_pct', 0) for e in labels]
-    colors = ['#636363', '#3182bd', '#fd8d3c', '#31a354', '#ffd92f']
-
-    fig, ax = plt.subplots(figsize=(4, 3))
-    bars = ax.bar(labels, values, color=colors)
-    for bar, pct in zip(bars, pct_values):
-        height = bar.get_height()
-        ax.annotate(f'{pct}%', xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3), textcoords="offset points", ha='center', va='bottom', fontsize=8)
-    ax.set_title(f"{row['abbreviation']} Energy Production (GWh)")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    buf = BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode('utf-8')
+def bar_chart_job(row):
+    return {
+        'abbreviation': row['abbreviation'],
+        'labels': energy_types,
+        'values': [row.get(e, 0) for e in energy_types],
+        'pct_values': [row.get(f'{e}_pct', 0) for e in energy_types],
+    }
 
 # Popups
-def generate_popup_html(row):
-    chart = create_bar_chart(row)
+def generate_popup_html(row, chart_img):
     html = f"""
     <div style="width: 400px;">
         <h4>{row['name']} ({row['abbreviation']})</h4>
-        <b>Total Production:</b> {row['total_production']:.0f} GWh<br>
-        <b>Consumption:</b> {row['consumption']:.0f} GWh<br>
+        <b>Total Production:</b> {row['total_production']:.0f} {BTU}<br>
+        <b>Consumption:</b> {row['consumption']:.0f} {BTU}<br>
         <b>Status:</b> {row['status']}<br>
         <b>Vulnerability Score:</b> {row['vulnerability_score']}<br><hr>
         <b>Energy Mix (% of total production):</b><br>
         Coal: {row['Coal_pct']}%, Natural Gas: {row['Natural Gas_pct']}%, Nuclear: {row['Nuclear_pct']}%,<br>
         Wind: {row['Wind_pct']}%, Solar: {row['Solar_pct']}%<br><br>
-        <img src="data:image/png;base64,{chart}" width="380">
+        {chart_img}
     </div>
     """
     return html
 
-for _, row in merged.iterrows():
-    popup = folium.Popup(folium.IFrame(generate_popup_html(row), width=420, height=450), max_width=450)
+# 'files': PNGs in docs/bars/ fetched when a popup opens, 'inline': base64 PNGs embedded in the page,
+# 'svg': only the energy-mix numbers are embedded and the bar chart is drawn in the browser
+POPUP_CHARTS = 'files'
+
+if POPUP_CHARTS == 'svg':
+    enable_svg_popup_charts(m, energy_mix_payload(merged, energy_types))
+else:
+    # Render all state bar charts across worker processes, returned in row order
+    with stage('render_charts'):
+        charts = render_charts(bar_chart, [bar_chart_job(row) for _, row in merged.iterrows()])
+    if POPUP_CHARTS == 'files':
+        with stage('write_charts'):
+            chart_urls = write_chart_files(charts, merged['abbreviation'], "docs/bars", "bars")
+        enable_lazy_popup_images(m)
+
+for i, (_, row) in enumerate(merged.iterrows()):
+    if POPUP_CHARTS == 'svg':
+        title = f"{row['abbreviation']} Energy Production ({BTU})"
+        chart_img = svg_chart_placeholder('bar', row['abbreviation'], title, 380, 285)
+        popup = folium.Popup(generate_popup_html(row, chart_img), max_width=450)
+    elif POPUP_CHARTS == 'inline':
+        chart_img = f'<img src="data:image/png;base64,{charts[i]}" width="380">'
+        popup = folium.Popup(folium.IFrame(generate_popup_html(row, chart_img), width=420, height=450), max_width=450)
+    else:
+        popup = folium.Popup(generate_popup_html(row, lazy_img(chart_urls[i], 380)), max_width=450)
     folium.Marker(
         location=[row['latitude'], row['longitude']],
         popup=popup,
@@ -163,24 +147,28 @@ for _, row in merged.iterrows():
         )
     ).add_to(m)
 
-folium.GeoJson(
-    merged.to_json(),
-    style_function=style_function,
-    tooltip=GeoJsonTooltip(
-        fields=[
-            "name", "total_production", "consumption", "category", "vulnerability_score", "status",
-            "Coal", "Natural Gas", "Nuclear", "Wind", "Solar"
-        ],
-        aliases=[
-            "State:", "Total Production (GWh):", "Consumption (GWh):", "Category:", "Vulnerability Score:", "Status:",
-            "Coal (GWh):", "Natural Gas (GWh):", "Nuclear (GWh):", "Wind (GWh):", "Solar (GWh):"
-        ],
-        localize=True,
-        sticky=True,
-        labels=True,
-        style="background-color: white; color: black; font-size: 12px; border: 1px solid gray; padding: 5px;"
-    )
-).add_to(m)
+# States layer: only the tooltip/style fields are exported, 'topojson' stores shared borders once
+GEO_FORMAT = 'topojson'
+tooltip_fields = [
+    "name", "total_production", "consumption", "category", "vulnerability_score", "status",
+    "Coal", "Natural Gas", "Nuclear", "Wind", "Solar"
+]
+with stage('states_layer'):
+    folium_layer(
+        merged, tooltip_fields, GEO_FORMAT,
+        style_function=style_function,
+        tooltip=GeoJsonTooltip(
+            fields=tooltip_fields,
+            aliases=[
+                "State:", f"Total Production ({BTU}):", f"Consumption ({BTU}):", "Category:", "Vulnerability Score:",
+                "Status:", *[f"{e} ({BTU}):" for e in energy_types]
+            ],
+            localize=True,
+            sticky=True,
+            labels=True,
+            style="background-color: white; color: black; font-size: 12px; border: 1px solid gray; padding: 5px;"
+        )
+    ).add_to(m)
 
 # Legend (updated color labels)
 legend_html = '''
@@ -203,5 +191,6 @@ m.get_root().html.add_child(folium.Element(legend_html))
 
 # Save
 os.makedirs("docs", exist_ok=True)
-m.save("docs/energy_production_map.html")
+with stage('save'):
+    m.save("docs/energy_production_map.html")
 print("✅ Revised polished map saved to docs/energy_production_map.html")
@@ -0,0 +1,150 @@
+import json
+import numpy as np
+import pandas as pd
+import folium
+
+# === Year slider for the folium maps ===
+# One map for every year: the layer geometry is written once and the per-year properties are shipped as
+# deltas against the previous year, which the browser replays when the slider moves.
+#   numeric fields      integers at a fixed number of decimals, stored as the first year's values plus
+#                       per-year differences (mostly small numbers or 0); null marks a missing value and
+#                       the value following a null is stored as-is
+#   categorical fields  label codes for the first year plus only the [key index, code] pairs that change
+
+
+def _grid(frame, key, time, field, keys, times):
+    return frame.pivot(index=time, columns=key, values=field).reindex(index=times, columns=keys)
+
+
+def delta_encode(frame, key, time, numeric=None, categorical=()):
+    """Per-`time` values of a long frame, delta-encoded; `numeric` maps field -> decimals to keep."""
+    keys = sorted(frame[key].dropna().unique().tolist())
+    times = sorted(frame[time].unique().tolist())
+    payload = {'key': key, 'keys': keys, 'times': times, 'numeric': {}, 'categorical': {}}
+
+    for field, digits in (numeric or {}).items():
+        grid = _grid(frame, key, time, field, keys, times).to_numpy(dtype=float)
+        values = np.round(grid * 10 ** digits)
+        missing = np.isnan(values)
+        deltas = np.diff(np.nan_to_num(values), axis=0)
+        # After a missing year the value is stored absolute; missing years are null
+        deltas = np.where(missing[:-1], np.nan_to_num(values[1:]), deltas)
+        deltas = np.where(missing[1:], np.nan, deltas)
+
+        def ints(row):
+            return [None if np.isnan(v) else int(v) for v in row]
+        payload['numeric'][field] = {
+            'scale': 10 ** digits,
+            'base': ints(values[0]),
+            'deltas': [ints(row) for row in deltas],
+        }
+
+    for field in categorical:
+        grid = _grid(frame, key, time, field, keys, times)
+        labels = sorted(pd.unique(grid.to_numpy().ravel()[pd.notna(grid.to_numpy().ravel())]).tolist())
+        codes = grid.apply(lambda col: col.map({label: i for i, label in enumerate(labels)})).to_numpy(dtype=float)
+        codes = np.nan_to_num(codes, nan=-1).astype(int)
+        changes = []
+        for prev, cur in zip(codes[:-1], codes[1:]):
+            idx = np.flatnonzero(prev != cur)
+            changes.append([[int(i), None if cur[i] < 0 else int(cur[i])] for i in idx])
+        payload['categorical'][field] = {
+            'labels': labels,
+            'base': [None if c < 0 else int(c) for c in codes[0]],
+            'changes': changes,
+        }
+    return payload
+
+
+TIME_SLIDER_JS = """
+document.addEventListener('DOMContentLoaded', function () {
+    var map = %(map)s, layer = %(layer)s, data = %(payload)s;
+    var colors = %(colors)s, colorField = %(color_field)s;
+
+    // Replay the deltas once into one frame of property arrays per time step
+    var frames = [], cur = {};
+    Object.keys(data.numeric).forEach(function (f) { cur[f] = data.numeric[f].base; });
+    Object.keys(data.categorical).forEach(function (f) { cur[f] = data.categorical[f].base; });
+    for (var t = 0; t < data.times.length; t++) {
+        if (t > 0) {
+            Object.keys(data.numeric).forEach(function (f) {
+                var d = data.numeric[f].deltas[t - 1];
+                cur[f] = cur[f].map(function (prev, k) { return (prev === null || d[k] === null) ? d[k] : prev + d[k]; });
+            });
+            Object.keys(data.categorical).forEach(function (f) {
+                var next = cur[f].slice();
+                data.categorical[f].changes[t - 1].forEach(function (c) { next[c[0]] = c[1]; });
+                cur[f] = next;
+            });
+        }
+        frames.push(Object.assign({}, cur));
+    }
+    var index = {};
+    data.keys.forEach(function (k, i) { index[k] = i; });
+
+    var control = L.control({position: 'bottomleft'});
+    control.onAdd = function () {
+        var div = L.DomUtil.create('div');
+        div.style.cssText = 'background:white;padding:8px 12px;border:2px solid grey;border-radius:5px;font-size:14px;';
+        div.innerHTML = '<b>%(title)s: <span></span></b><br><button type="button" style="width:32px">&#9654;</button> ' +
+            '<input type="range" min="0" max="' + (data.times.length - 1) + '" step="1" style="width:320px;vertical-align:middle">';
+        L.DomEvent.disableClickPropagation(div);
+        L.DomEvent.disableScrollPropagation(div);
+        return div;
+    };
+    control.addTo(map);
+    var box = control.getContainer();
+    var label = box.querySelector('span'), slider = box.querySelector('input'), button = box.querySelector('button');
+
+    function show(t) {
+        var frame = frames[t];
+        layer.eachLayer(function (l) {
+            var props = l.feature.properties, i = index[props[data.key]];
+            if (i === undefined) { return; }
+            Object.keys(data.numeric).forEach(function (f) {
+                var v = frame[f][i];
+                props[f] = v === null ? null : v / data.numeric[f].scale;
+            });
+            Object.keys(data.categorical).forEach(function (f) {
+                var c = frame[f][i];
+                props[f] = c === null ? null : data.categorical[f].labels[c];
+            });
+            l.setStyle({fillColor: colors[props[colorField]] || 'gray'});
+        });
+        label.textContent = data.times[t];
+        slider.value = t;
+    }
+
+    var timer = null;
+    function stop() { clearInterval(timer); timer = null; button.innerHTML = '&#9654;'; }
+    button.addEventListener('click', function () {
+        if (timer) { stop(); return; }
+        if (+slider.value === data.times.length - 1) { show(0); }
+        button.innerHTML = '&#10074;&#10074;';
+        timer = setInterval(function () {
+            var t = +slider.value + 1;
+            if (t >= data.times.length) { stop(); return; }
+            show(t);
+        }, %(interval)d);
+    });
+    slider.addEventListener('input', function () { stop(); show(+slider.value); });
+    show(Math.max(0, data.times.indexOf(%(start)s)));
+});
+"""
+
+
+def add_time_slider(m, layer, payload, color_field, colors, start=None, title='Year', interval_ms=400):
+    """Year slider (with play button) that restyles `layer` and updates its tooltip properties per time step.
+
+    The layer's features must carry payload['key'] among their properties.
+    """
+    m.get_root().script.add_child(folium.Element(TIME_SLIDER_JS % {
+        'map': m.get_name(),
+        'layer': layer.get_name(),
+        'payload': json.dumps(payload, separators=(',', ':')),
+        'colors': json.dumps(colors),
+        'color_field': json.dumps(color_field),
+        'title': title,
+        'interval': interval_ms,
+        'start': json.dumps(payload['times'][-1] if start is None else start),
+    }))
@@ -0,0 +1,20 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# === Worker process pools ===
+# The report and map scripts have no __main__ guard, so their pools fork where the platform allows it:
+# a spawned worker would re-import, and so re-run, the calling script. Forked workers also inherit
+# the caller's loaded data instead of receiving it pickled.
+
+
+def use_agg():
+    """Pool initializer for workers that draw with matplotlib: no GUI backend in a child process."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def process_pool(processes, initializer=None):
+    """ProcessPoolExecutor with `processes` workers, forked where available."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=initializer)